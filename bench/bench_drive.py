@@ -0,0 +1,117 @@
+"""
+Drive archive benchmark: archive_week against the local fake Drive server,
+next to the old serial path (find_or_create_folder + upload_bytes per file).
+
+Usage:
+  python bench/bench_drive.py --latency 0.05 --mp3-mb 12 --profiles 2
+  python bench/bench_drive.py --chunk-mb 1 --workers 1   # one upload at a time, small chunks
+
+Builds a synthetic dist/ (all_episodes.txt, four scripts, four MP3s per feed
+profile) in a scratch directory and reports wall time, peak Python memory
+(tracemalloc) and Drive requests per kind for each run.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "bench"))
+
+from fake_drive import FakeDrive, start_server
+from src.drive_upload import (
+    MB, DriveArchive, FolderCache, archive_files, archive_week, build_drive_service,
+    find_or_create_folder, http_factory, upload_bytes,
+)
+from src.feed_profiles import FeedProfile
+
+TAG = "week-2026-03-02"
+
+
+def make_dist(dist: Path, profiles: list[FeedProfile], mp3_bytes: int) -> None:
+    dist.mkdir(parents=True)
+    (dist / "all_episodes.txt").write_text("Script text. " * 4000, encoding="utf-8")
+    for i in range(1, 5):
+        (dist / f"W10_E{i:02d}.txt").write_text("Script text. " * 1000, encoding="utf-8")
+        for profile in profiles:
+            out = profile.dist_dir(dist)
+            out.mkdir(exist_ok=True)
+            (out / f"W10_E{i:02d}.mp3").write_bytes(os.urandom(mp3_bytes))
+
+
+def serial_in_memory(root_url: str, dist: Path, profiles: list[FeedProfile]) -> None:
+    """
+    The pre-archive helpers: one folder lookup per file, whole file in memory, one at a time.
+    """
+    service = build_drive_service(http_factory(root_url)(), root_url)
+    tag = f"{TAG}-serial"
+    for subdir, paths in archive_files(dist, profiles).items():
+        for path in paths:
+            folder = find_or_create_folder(service, tag, "root")
+            if subdir:
+                folder = find_or_create_folder(service, subdir, folder)
+            mime = "audio/mpeg" if path.suffix == ".mp3" else "text/plain"
+            upload_bytes(service, folder, path.name, path.read_bytes(), mime)
+
+
+def timed(label: str, drive: FakeDrive, fn) -> None:
+    before = dict(drive.counts)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    calls = {k: v - before.get(k, 0) for k, v in drive.counts.items() if v != before.get(k, 0)}
+    http = sum(v for k, v in calls.items() if k != "batch:calls")
+    print(f"{label:34s} {seconds:6.2f} s  peak {peak / MB:6.1f} MB  {http:3d} HTTP requests  "
+          f"{', '.join(f'{k}={v}' for k, v in sorted(calls.items()))}")
+    if result:
+        print(f"{'':34s} {result}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every Drive request")
+    parser.add_argument("--mp3-mb", type=float, default=12, help="size of each synthetic MP3")
+    parser.add_argument("--profiles", type=int, default=1, help="feed profiles (MP3 sets) to archive")
+    parser.add_argument("--chunk-mb", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--skip-serial", action="store_true", help="skip the old serial in-memory run")
+    args = parser.parse_args()
+
+    drive = FakeDrive(args.latency)
+    server = start_server(drive)
+    root_url = f"http://127.0.0.1:{server.server_port}/"
+
+    work = Path(tempfile.mkdtemp(prefix="cfm-bench-drive-"))
+    profiles = [FeedProfile("main", primary=True)] + [FeedProfile(f"alt{n}") for n in range(1, args.profiles)]
+    make_dist(work / "dist", profiles, int(args.mp3_mb * MB))
+    files = sum(len(p) for p in archive_files(work / "dist", profiles).values())
+    print(f"=== bench_drive ({files} files, {args.mp3_mb:g} MB MP3s, latency {args.latency}s, "
+          f"{args.workers} workers, {args.chunk_mb} MB chunks) ===")
+
+    folders = FolderCache(work / "drive_folders.json")
+
+    def archive():
+        a = DriveArchive(http_factory(root_url), folders, root_url, args.workers, args.chunk_mb * MB)
+        return archive_week(TAG, work / "dist", "root", a, profiles)
+
+    if not args.skip_serial:
+        timed("serial, in memory (old helpers)", drive, lambda: serial_in_memory(root_url, work / "dist", profiles))
+    timed("archive_week (cold folder cache)", drive, archive)
+    timed("archive_week (rerun, unchanged)", drive, archive)
+    (work / "dist" / "W10_E01.mp3").write_bytes(os.urandom(int(args.mp3_mb * MB)))
+    timed("archive_week (one MP3 changed)", drive, archive)
+
+    server.shutdown()
+    shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Compare the lxml and BeautifulSoup extraction paths in cfm_fetch.
+
+Usage:
+  python bench/bench_extract.py                 # benchmark bench/fixtures/*.html
+  python bench/bench_extract.py --record 10     # save the first 10 index pages as fixtures first
+  python bench/bench_extract.py --synthetic     # a generated manual-shaped page instead
+
+Without recorded fixtures (and without --synthetic) it exits with an error.
+Exits non-zero if lxml and bs4 give different text for any page.
+Time is the best of --repeat runs in-process; peak memory is the max RSS growth
+of a fresh subprocess running one extraction (lxml allocates outside
+tracemalloc's view, so RSS is the fair measure).
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.cfm_fetch import extract_text, extract_text_bs4
+
+FIXTURES = REPO_ROOT / "bench" / "fixtures"
+EXTRACTORS = {"lxml": extract_text, "bs4": extract_text_bs4}
+
+
+def synthetic_page(sections: int = 40) -> str:
+    nav = "".join(f'<li><a href="/study/{i}">Link {i}</a></li>' for i in range(300))
+    body = []
+    for i in range(sections):
+        body.append(
+            f'<section><h2 id="s{i}">Section {i}</h2>'
+            f'<p data-aid="{i}">Ideas for personal study {i}. <a href="/sc/gen/{i}">Genesis {i}:1</a> '
+            "teaches that God created the heavens and the earth. " * 4 + "</p>"
+            f'<figure><img src="/img/{i}.jpg"><figcaption>Caption {i}</figcaption></figure>'
+            f"<aside>Related content {i}</aside><script>track({i})</script></section>"
+        )
+    return (
+        "<html><head><style>body{}</style><script>var x=1;</script></head><body>"
+        f"<header><nav><ul>{nav}</ul></nav></header>"
+        f'<main><div class="body-block">{"".join(body)}</div></main>'
+        f"<footer><ul>{nav}</ul></footer></body></html>"
+    )
+
+
+def load_fixtures(synthetic: bool = False) -> dict:
+    """
+    Recorded manual pages from bench/fixtures/*.html, or only the synthetic page
+    when asked for. Never falls back silently.
+    """
+    if synthetic:
+        return {"synthetic.html": synthetic_page()}
+    pages = {p.name: p.read_text(encoding="utf-8") for p in sorted(FIXTURES.glob("*.html"))}
+    if not pages:
+        raise SystemExit(
+            f"No fixtures in {FIXTURES}. Record some with `python bench/bench_extract.py --record 5` "
+            "(needs network access), or pass --synthetic."
+        )
+    return pages
+
+
+def record(count: int) -> None:
+    from src.cfm_fetch import get_page_cache, fetch_cfm_week_text
+    from src.disk_cache import cache_key
+    from src.week_index import load_week_index
+
+    FIXTURES.mkdir(parents=True, exist_ok=True)
+    for wk in load_week_index().weeks[:count]:
+        fetch_cfm_week_text(wk["url"])
+        entry = json.loads(get_page_cache().get(cache_key(wk["url"])))
+        out = FIXTURES / f"week{int(wk['week']):02d}.html"
+        out.write_text(entry["html"], encoding="utf-8")
+        print(f"Recorded {out}")
+
+
+def best_time(fn, html: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _hwm_kib() -> int:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _rss_kib() -> int:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(name: str, path: str) -> None:
+    html = Path(path).read_text(encoding="utf-8") if path != "-" else synthetic_page()
+    try:
+        # Reset the peak-RSS watermark so import-time peaks don't hide the extraction.
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+    before = _rss_kib()
+    EXTRACTORS[name](html)
+    print(_hwm_kib() - before)
+
+
+def peak_kib(name: str, fixture: str) -> int:
+    path = str(FIXTURES / fixture) if (FIXTURES / fixture).exists() else "-"
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", name, path],
+        check=True, capture_output=True, text=True,
+    )
+    return int(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", type=int, default=0, help="save the first N index pages as fixtures")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--synthetic", action="store_true", help="use a generated page instead of fixtures")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+    if args.record:
+        record(args.record)
+
+    pages = load_fixtures(args.synthetic)
+    print(f"{'page':<20} {'KB':>7} {'extractor':<6} {'ms':>8} {'peak RSS KiB':>13}")
+    totals = {name: 0.0 for name in EXTRACTORS}
+    differ = []
+    for fixture, html in pages.items():
+        if extract_text(html) != extract_text_bs4(html):
+            differ.append(fixture)
+        for name, fn in EXTRACTORS.items():
+            t = best_time(fn, html, args.repeat)
+            totals[name] += t
+            print(f"{fixture:<20} {len(html) // 1024:>7} {name:<6} {t * 1000:>8.1f} {peak_kib(name, fixture):>13}")
+
+    if totals["lxml"]:
+        print(f"Total: lxml {totals['lxml'] * 1000:.1f} ms, bs4 {totals['bs4'] * 1000:.1f} ms "
+              f"({totals['bs4'] / totals['lxml']:.1f}x)")
+    if differ:
+        raise SystemExit(f"lxml and bs4 output differ for: {', '.join(differ)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+End-to-end benchmark: run_weekly.main against the local fake OpenAI server.
+
+Usage:
+  python bench/bench_pipeline.py --latency 0.3 --jitter 0.1 --rate-limit 0.05
+  python bench/bench_pipeline.py --episode-words 900   # exercise the expand path
+  python bench/bench_pipeline.py --lookahead           # time a publish run of a prepared week
+  python bench/bench_pipeline.py --cli                 # src/cli.py all: also tag, copy media, update RSS
+
+Runs in a scratch directory with fresh caches (unless --keep-caches), serves
+recorded manual pages from bench/fixtures/*.html (see bench_extract.py
+--record; --synthetic uses a generated page and says so) through a
+requests adapter, and reports wall-clock time, peak RSS, request counts and
+points at the trace files. Nothing leaves the machine and no API key is needed.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import BaseAdapter
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "bench"))
+
+from fake_openai import FakeConfig, start_server
+from bench_extract import load_fixtures
+
+MANUAL_HOST = "https://www.churchofjesuschrist.org/"
+
+
+class FixtureAdapter(BaseAdapter):
+    """
+    Answers every manual URL with a recorded fixture page (round-robin).
+    """
+
+    def __init__(self, pages: list[str]):
+        super().__init__()
+        self.pages = pages
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = self.pages[self.calls % len(self.pages)].encode("utf-8")
+        resp.headers["Content-Type"] = "text/html; charset=utf-8"
+        resp.encoding = "utf-8"
+        resp.url = request.url
+        resp.request = request
+        self.calls += 1
+        return resp
+
+    def close(self):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--episode-words", type=int, default=1450)
+    parser.add_argument("--week-date", default="2026-03-02")
+    parser.add_argument("--keep-caches", action="store_true", help="reuse .cache/ between runs in the scratch dir")
+    parser.add_argument("--workdir", type=Path, help="scratch directory (default: a new temp dir)")
+    parser.add_argument("--lookahead", action="store_true",
+                        help="prepare the week with src/lookahead.py first (untimed), then time the publish run")
+    parser.add_argument("--cli", action="store_true",
+                        help="run `src/cli.py all` (with a copy of docs/) instead of run_weekly.main")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="serve a generated manual page instead of bench/fixtures/*.html")
+    args = parser.parse_args()
+    pages = load_fixtures(args.synthetic)
+
+    cfg = FakeConfig(args.latency, args.jitter, args.rate_limit, args.episode_words)
+    server = start_server(cfg)
+
+    work = args.workdir or Path(tempfile.mkdtemp(prefix="cfm-bench-"))
+    work.mkdir(parents=True, exist_ok=True)
+    shutil.copytree(REPO_ROOT / "prompts", work / "prompts", dirs_exist_ok=True)
+    if not args.keep_caches:
+        shutil.rmtree(work / ".cache", ignore_errors=True)
+    shutil.rmtree(work / "dist", ignore_errors=True)
+    shutil.rmtree(work / "docs", ignore_errors=True)
+    if args.cli:
+        shutil.copytree(REPO_ROOT / "docs", work / "docs")
+
+    os.environ.update({
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_port}/v1",
+        "OPENAI_API_KEY": "fake",
+        "WEEK_DATE": args.week_date,
+        "FORCE_REGENERATE": "true",
+        "RESUME": "false",
+        "TRACE_CHROME": "true",
+    })
+    os.chdir(work)
+
+    # Import after the env is set: modules read their settings at import time.
+    from src import run_weekly
+    from src.cfm_fetch import get_session
+
+    adapter = FixtureAdapter(list(pages.values()))
+    get_session().mount(MANUAL_HOST, adapter)
+
+    if args.lookahead:
+        from src import lookahead
+
+        shutil.rmtree(work / ".cache" / "prepared", ignore_errors=True)
+        lookahead.main(["--from", args.week_date, "--count", "1"])
+        os.environ.update({"RESUME": "true", "FORCE_REGENERATE": "false"})
+        with cfg.lock:
+            cfg.counts.clear()
+        adapter.calls = 0
+
+    t0 = time.perf_counter()
+    if args.cli:
+        from src import cli
+
+        cli.main(["all", "--repo", "bench/cfm-personal-podcast"])
+    else:
+        run_weekly.main()
+    wall = time.perf_counter() - t0
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    with cfg.lock:
+        counts = dict(cfg.counts)
+    mp3s = sorted((work / "dist").glob("W*_E*.mp3"))
+
+    print("\n=== bench_pipeline ===")
+    print(f"workdir:      {work}")
+    print(f"wall clock:   {wall:.2f}s")
+    print(f"peak RSS:     {peak_mib:.0f} MiB")
+    print(f"page fetches: {adapter.calls} ({'synthetic page' if args.synthetic else f'{len(pages)} fixture(s)'})")
+    print(f"API requests: {json.dumps(counts, sort_keys=True)}")
+    print(f"MP3s:         {len(mp3s)} ({sum(p.stat().st_size for p in mp3s) / 1e6:.1f} MB)")
+    print("(per-stage breakdown: dist/trace.json, dist/trace.chrome.json)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Startup benchmark: wall time of a skip-run (week already published) and the
+heavy modules it loads.
+
+Usage:
+  python bench/bench_startup.py --repeat 5
+
+Runs each command in a fresh interpreter inside a scratch copy of docs/,
+cfm_index/, prompts/ and feeds.json, with WEEK_DATE set to the newest published
+week, so nothing is generated or sent. Imports are read from -X importtime.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY = ("openai", "httpx", "bs4", "lxml", "mutagen", "requests", "tiktoken")
+
+COMMANDS = {
+    "cli all (skip)": [sys.executable, str(REPO_ROOT / "src" / "cli.py"), "all", "--repo", "bench/cfm"],
+    "run_weekly (skip)": [sys.executable, str(REPO_ROOT / "src" / "run_weekly.py")],
+    "import openai": [sys.executable, "-c", "import openai"],
+    "import all heavy deps": [sys.executable, "-c", "import openai, bs4, lxml.html, mutagen.id3, requests"],
+}
+
+
+def heavy_imports(cmd: list[str], cwd: Path, env: dict) -> list[str]:
+    proc = subprocess.run([cmd[0], "-X", "importtime", *cmd[1:]], cwd=cwd, env=env,
+                          capture_output=True, text=True)
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            name = line.rsplit("|", 1)[1].strip()
+            if name in HEAVY:
+                loaded.add(name)
+    return sorted(loaded)
+
+
+def best_time(cmd: list[str], cwd: Path, env: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="cfm-startup-"))
+    for name in ("docs", "cfm_index", "prompts"):
+        shutil.copytree(REPO_ROOT / name, work / name)
+    shutil.copy2(REPO_ROOT / "feeds.json", work / "feeds.json")
+
+    published = json.loads((work / "docs" / "published.json").read_text(encoding="utf-8"))["weeks"]
+    week_date = max(published).removeprefix("week-")
+    env = {**os.environ, "OPENAI_API_KEY": "fake", "WEEK_DATE": week_date, "FORCE_REGENERATE": "false"}
+
+    print(f"=== bench_startup (skip-run for week-{week_date}, best of {args.repeat}) ===")
+    for label, cmd in COMMANDS.items():
+        seconds = best_time(cmd, work, env, args.repeat)
+        loaded = heavy_imports(cmd, work, env)
+        print(f"{label:24s} {seconds * 1000:7.0f} ms   heavy imports: {', '.join(loaded) or 'none'}")
+    shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
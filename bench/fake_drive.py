@@ -0,0 +1,291 @@
+"""
+Local stand-in for the Google Drive v3 endpoints the archive stage uses.
+
+  GET    /drive/v3/files                     list (q: name, mimeType, '<id>' in parents, trashed)
+  POST   /drive/v3/files                     create a folder (metadata only)
+  DELETE /drive/v3/files/<id>                delete a file or folder
+  POST   /upload/drive/v3/files              media, multipart or resumable upload
+  PATCH  /upload/drive/v3/files/<id>         new revision (media, multipart or resumable)
+  PUT    <resumable session URL>             one chunk; 308 + Range until the last
+  POST   /batch/drive/v3                     multipart/mixed batch of the calls above
+  GET    /stats                              request counts per kind
+
+File contents are not kept, only their size and md5.
+
+Usage:
+  python bench/fake_drive.py --port 8809 --latency 0.05
+  DRIVE_ROOT_URL=http://127.0.0.1:8809/ DRIVE_FOLDER_ID=root python src/drive_upload.py --tag week-2026-03-02
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from email import message_from_string
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FOLDER_MIME = "application/vnd.google-apps.folder"
+
+
+class FakeDrive:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.files: dict[str, dict] = {"root": {"id": "root", "name": "root", "mimeType": FOLDER_MIME, "parents": []}}
+        self.sessions: dict[str, dict] = {}
+        self.counts: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def new_file(self, meta: dict, content_md5: str | None = None, size: int = 0) -> dict:
+        f = {
+            "id": uuid.uuid4().hex[:16],
+            "name": meta.get("name", "untitled"),
+            "mimeType": meta.get("mimeType", "application/octet-stream"),
+            "parents": meta.get("parents", ["root"]),
+            "trashed": False,
+        }
+        if content_md5 is not None:
+            f.update(md5Checksum=content_md5, size=str(size))
+        with self.lock:
+            self.files[f["id"]] = f
+        return f
+
+    def delete(self, file_id: str) -> bool:
+        """
+        Remove a file, or a folder and everything under it.
+        """
+        with self.lock:
+            if self.files.pop(file_id, None) is None:
+                return False
+            children = [f["id"] for f in self.files.values() if file_id in f.get("parents", [])]
+        for child in children:
+            self.delete(child)
+        return True
+
+    def list(self, q: str) -> list[dict]:
+        conds = []
+        for m in re.finditer(r"(\w+)\s*=\s*'([^']*)'|'([^']*)' in parents|trashed\s*=\s*(true|false)", q):
+            if m.group(1):
+                conds.append(lambda f, k=m.group(1), v=m.group(2): f.get(k) == v)
+            elif m.group(3):
+                conds.append(lambda f, p=m.group(3): p in f.get("parents", []))
+            else:
+                conds.append(lambda f, t=m.group(4) == "true": f.get("trashed", False) == t)
+        with self.lock:
+            return [dict(f) for f in self.files.values() if all(c(f) for c in conds)]
+
+
+def split_multipart(body: bytes, boundary: str) -> list[tuple[dict, bytes]]:
+    """
+    (headers, payload) for each part; payloads are left as raw bytes.
+    """
+    parts = []
+    for chunk in body.split(b"--" + boundary.encode())[1:]:
+        if chunk.startswith(b"--"):
+            break
+        chunk = chunk.removeprefix(b"\r\n").removeprefix(b"\n")
+        crlf, lf = chunk.find(b"\r\n\r\n"), chunk.find(b"\n\n")
+        sep = b"\r\n\r\n" if crlf != -1 and (lf == -1 or crlf < lf) else b"\n\n"
+        head, _, payload = chunk.partition(sep)
+        if payload.endswith(b"\r\n"):
+            payload = payload[:-2]
+        elif payload.endswith(b"\n"):
+            payload = payload[:-1]
+        headers = {}
+        for line in head.decode().splitlines():
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        parts.append((headers, payload))
+    return parts
+
+
+def boundary_of(content_type: str) -> str:
+    return re.search(r'boundary="?([^";]+)"?', content_type).group(1)
+
+
+class Handler(BaseHTTPRequestHandler):
+    drive: FakeDrive = FakeDrive()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: bytes = b"", headers: dict | None = None) -> None:
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        if self.drive.latency:
+            time.sleep(self.drive.latency)
+        if self.path.rstrip("/") == "/batch/drive/v3":
+            self._reply(*self.batch(body))
+        else:
+            headers = {k.lower(): v for k, v in self.headers.items()}
+            self._reply(*self.api(self.command, self.path, headers, body))
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+    def api(self, method: str, url: str, headers: dict, body: bytes) -> tuple[int, bytes, dict]:
+        drive = self.drive
+        parts = urlsplit(url)
+        path = parts.path.rstrip("/")
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        as_json = lambda obj, status=200, extra=None: (
+            status, json.dumps(obj).encode(), {"Content-Type": "application/json; charset=UTF-8", **(extra or {})})
+
+        if path == "/stats":
+            with drive.lock:
+                return as_json(dict(drive.counts))
+
+        if path == "/drive/v3/files" and method == "GET":
+            drive.count("list")
+            return as_json({"files": drive.list(query.get("q", ""))})
+
+        if path == "/drive/v3/files" and method == "POST":
+            drive.count("create")
+            return as_json(drive.new_file(json.loads(body or b"{}")))
+
+        m = re.fullmatch(r"/drive/v3/files/(\w+)", path)
+        if m and method == "DELETE":
+            drive.count("delete")
+            return (204, b"", {}) if drive.delete(m.group(1)) else as_json({"error": {"code": 404, "message": "File not found"}}, 404)
+
+        m = re.fullmatch(r"/upload/drive/v3/files(?:/(\w+))?", path)
+        if not m:
+            return as_json({"error": {"code": 404, "message": f"No route for {method} {path}"}}, 404)
+        file_id = m.group(1)
+        if file_id and file_id not in drive.files:
+            return as_json({"error": {"code": 404, "message": f"File not found: {file_id}"}}, 404)
+
+        upload_type = query.get("uploadType")
+        if upload_type == "multipart" and method in ("POST", "PATCH"):
+            drive.count("upload:multipart")
+            (_, meta_raw), (_, media) = split_multipart(body, boundary_of(headers["content-type"]))
+            meta = json.loads(meta_raw or b"{}")
+            if self._missing_parent(meta):
+                return as_json({"error": {"code": 404, "message": f"File not found: {self._missing_parent(meta)}"}}, 404)
+            return as_json(self._store(meta, file_id, hashlib.md5(media).hexdigest(), len(media)))
+
+        if upload_type == "media" and method in ("POST", "PATCH"):
+            # Content only (a new revision, or a file with no metadata).
+            drive.count("upload:media")
+            meta = {} if file_id else {"parents": ["root"]}
+            return as_json(self._store(meta, file_id, hashlib.md5(body).hexdigest(), len(body)))
+
+        if upload_type == "resumable" and method in ("POST", "PATCH"):
+            drive.count("upload:resumable")
+            meta = json.loads(body or b"{}")
+            if self._missing_parent(meta):
+                return as_json({"error": {"code": 404, "message": f"File not found: {self._missing_parent(meta)}"}}, 404)
+            upload_id = uuid.uuid4().hex
+            with drive.lock:
+                drive.sessions[upload_id] = {"meta": meta, "file_id": file_id, "md5": hashlib.md5(), "received": 0}
+            location = f"http://{self.headers['Host']}/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"
+            return 200, b"", {"Location": location}
+
+        if upload_type == "resumable" and method == "PUT":
+            drive.count("upload:chunk")
+            session = drive.sessions.get(query.get("upload_id", ""))
+            if session is None:
+                return as_json({"error": {"code": 404, "message": "Upload session not found"}}, 404)
+            rng = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+|\*)|bytes \*/(\d+|\*)", headers.get("content-range", ""))
+            if rng and rng.group(1) is not None:
+                start, end, total = int(rng.group(1)), int(rng.group(2)), rng.group(3)
+                if start != session["received"]:
+                    return as_json({"error": {"code": 400, "message": "Chunk out of order"}}, 400)
+                session["md5"].update(body)
+                session["received"] = end + 1
+                if total == "*" or session["received"] < int(total):
+                    return 308, b"", {"Range": f"bytes=0-{end}"}
+            elif rng is None:
+                session["md5"].update(body)
+                session["received"] += len(body)
+            elif rng.group(4) == "*" or session["received"] < int(rng.group(4)):
+                # Status query: report what has arrived so far.
+                done = session["received"]
+                return 308, b"", {"Range": f"bytes=0-{done - 1}"} if done else {}
+            drive.sessions.pop(query["upload_id"], None)
+            return as_json(self._store(session["meta"], session["file_id"], session["md5"].hexdigest(), session["received"]))
+
+        return as_json({"error": {"code": 400, "message": f"Unsupported upload: {method} {url}"}}, 400)
+
+    def _missing_parent(self, meta: dict) -> str | None:
+        with self.drive.lock:
+            return next((p for p in meta.get("parents", []) if p not in self.drive.files), None)
+
+    def _store(self, meta: dict, file_id: str | None, md5: str, size: int) -> dict:
+        drive = self.drive
+        if file_id:
+            drive.count("update")
+            with drive.lock:
+                f = drive.files[file_id]
+                f.update({k: v for k, v in meta.items() if k in ("name", "mimeType")}, md5Checksum=md5, size=str(size))
+                return dict(f)
+        return drive.new_file(meta, md5, size)
+
+    def batch(self, body: bytes) -> tuple[int, bytes, dict]:
+        """
+        Run each application/http part through api() and answer multipart/mixed,
+        echoing Content-IDs as <response-...>.
+        """
+        self.drive.count("batch")
+        boundary = "batch_" + uuid.uuid4().hex
+        out = []
+        for headers, payload in split_multipart(body, boundary_of(self.headers["Content-Type"])):
+            self.drive.count("batch:calls")
+            request_line, _, rest = payload.decode().partition("\n")
+            method, url, _ = request_line.strip().split(" ", 2)
+            inner = message_from_string(rest)
+            inner_body = (inner.get_payload() or "").encode()
+            status, content, resp_headers = self.api(
+                method, url, {k.lower(): v for k, v in inner.items()}, inner_body)
+            lines = [f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}"]
+            lines += [f"{k}: {v}" for k, v in resp_headers.items()]
+            cid = headers.get("content-id", "<>")
+            out.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{cid[1:]}\r\n\r\n"
+                + "\r\n".join(lines) + "\r\n\r\n" + content.decode() + "\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        return 200, "".join(out).encode(), {"Content-Type": f"multipart/mixed; boundary={boundary}"}
+
+
+def start_server(drive: FakeDrive, port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start the fake on a background thread; port 0 picks a free port (see server.server_port).
+    """
+    handler = type("BoundHandler", (Handler,), {"drive": drive})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Google Drive server for offline runs.")
+    parser.add_argument("--port", type=int, default=8809)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every HTTP request")
+    args = parser.parse_args()
+
+    server = start_server(FakeDrive(args.latency), args.port)
+    print(f"Fake Drive listening on http://127.0.0.1:{server.server_port}/ (root folder ID: root)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
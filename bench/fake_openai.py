@@ -0,0 +1,267 @@
+"""
+Local stand-in for the OpenAI endpoints the pipeline uses.
+
+  POST /v1/responses       canned scripts (4-episode output with the exact
+                           "=== EPISODE n: ... ===" headers, or one resized episode);
+                           with "stream": true, sent as SSE text deltas spread over
+                           the latency; paragraph-edit JSON for length fitting
+  POST /v1/audio/speech    valid MPEG-2 Layer III frames, duration proportional to input
+  GET  /stats              request counts per endpoint
+
+Usage:
+  python bench/fake_openai.py --port 8808 --latency 0.5 --jitter 0.2 --rate-limit 0.05
+  OPENAI_BASE_URL=http://127.0.0.1:8808/v1 OPENAI_API_KEY=fake python src/run_weekly.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EPISODE_HEADERS = [
+    "=== EPISODE 1: BIG PICTURE & CONTEXT ===",
+    "=== EPISODE 2: SCRIPTURE WALKTHROUGH ===",
+    "=== EPISODE 3: DOCTRINES & PRINCIPLES ===",
+    "=== EPISODE 4: MODERN LIFE APPLICATION ===",
+]
+
+SENTENCE = (
+    "In this part of the lesson we slow down and read the verses carefully, "
+    "asking what the Lord is teaching and how it can shape the week ahead. "
+)
+
+# MPEG-2 Layer III, 24 kHz, 64 kbps, mono: 192-byte frames of 576 samples (24 ms).
+FRAME_HEADER = bytes([0xFF, 0xF3, 0x84, 0xC4])
+FRAME = FRAME_HEADER + bytes(192 - 4)
+FRAMES_PER_CHAR = 2  # ~48 ms of audio per character, close to real speech pace
+STREAM_DELTA_WORDS = 8
+
+
+class FakeConfig:
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=0.0, episode_words=1450, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.episode_words = episode_words
+        self.random = random.Random(seed)
+        self.counts: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def script_body(words: int) -> str:
+    per = len(SENTENCE.split())
+    paragraphs = []
+    total = 0
+    while total < words:
+        paragraphs.append(SENTENCE * 4)
+        total += per * 4
+    return "\n\n".join(paragraphs)
+
+
+def episode(i: int, words: int) -> str:
+    return (
+        f"{EPISODE_HEADERS[i]}\n\n"
+        "Outline: welcome, context, key verses, application.\n\n"
+        f"{script_body(words)}\n\n"
+        "Pause & Ponder: What is one thing you will try this week?\n\n"
+        "SHOW NOTES:\n- Key scriptures: Genesis 1\n- 3 takeaways: read, ponder, act\n"
+    )
+
+
+def paragraph_edits(prompt: str) -> str:
+    """
+    Answer a fit_to_word_range request: insert or drop body paragraphs to land
+    mid-range.
+    """
+    wc = int(re.search(r"Current length: (\d+) words", prompt).group(1))
+    lo, hi = map(int, re.search(r"Target: (\d+)-(\d+) words", prompt).group(1, 2))
+    body = re.findall(r"^\[(P\d+)\] In this part", prompt, re.MULTILINE)
+    per = len(SENTENCE.split()) * 4
+    if wc < lo:
+        n = -(-((lo + hi) // 2 - wc) // per)
+        return json.dumps({"insert": [{"after": body[-1] if body else "P1", "text": SENTENCE * 4}] * n})
+    n = min(len(body), (wc - (lo + hi) // 2) // per)
+    return json.dumps({"drop": body[:n]})
+
+
+def canned_output(prompt: str, cfg: FakeConfig) -> str:
+    if "Return ONLY a JSON object" in prompt:
+        return paragraph_edits(prompt)
+    if "=== EPISODE 4" in prompt and "Return EXACTLY 4 episodes" in prompt:
+        return "\n\n".join(episode(i, cfg.episode_words) for i in range(4))
+    # Per-episode prompts and resize requests: one episode in the target range.
+    for i, header in enumerate(EPISODE_HEADERS):
+        if header in prompt:
+            return episode(i, 1450)
+    return script_body(1450)
+
+
+class Handler(BaseHTTPRequestHandler):
+    cfg: FakeConfig = FakeConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, ctype: str, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _latency(self) -> float:
+        return max(0.0, self.cfg.latency + self.cfg.random.uniform(-self.cfg.jitter, self.cfg.jitter))
+
+    def _delay(self) -> None:
+        d = self._latency()
+        if d > 0:
+            time.sleep(d)
+
+    def _stream(self, body: dict, text: str) -> None:
+        """
+        Responses API server-sent events: created, one output_text.delta per
+        STREAM_DELTA_WORDS words (paced so the whole text takes the latency), completed.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        seq = 0
+
+        def event(kind: str, data: dict) -> None:
+            nonlocal seq
+            data = {"type": kind, "sequence_number": seq, **data}
+            seq += 1
+            chunk = f"event: {kind}\ndata: {json.dumps(data)}\n\n".encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.flush()
+
+        words = text.split(" ")
+        deltas = [
+            " ".join(words[i:i + STREAM_DELTA_WORDS]) + (" " if i + STREAM_DELTA_WORDS < len(words) else "")
+            for i in range(0, len(words), STREAM_DELTA_WORDS)
+        ]
+        pause = self._latency() / max(1, len(deltas))
+        event("response.created", {"response": {**body, "status": "in_progress", "output": []}})
+        for delta in deltas:
+            if pause:
+                time.sleep(pause)
+            event("response.output_text.delta", {
+                "item_id": "msg_fake", "output_index": 0, "content_index": 0, "delta": delta, "logprobs": [],
+            })
+        event("response.completed", {"response": body})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _maybe_429(self, key: str) -> bool:
+        if self.cfg.rate_limit and self.cfg.random.random() < self.cfg.rate_limit:
+            self.cfg.count(f"{key}:429")
+            err = {"error": {"message": "Rate limit reached (fake)", "type": "requests", "code": "rate_limit_exceeded"}}
+            self._send(429, json.dumps(err).encode(), "application/json", {"retry-after-ms": "50"})
+            return True
+        return False
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.cfg.lock:
+                body = json.dumps(self.cfg.counts).encode()
+            self._send(200, body, "application/json")
+        else:
+            self._send(404, b"{}", "application/json")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        path = self.path.split("?", 1)[0].rstrip("/")
+
+        if path.endswith("/responses"):
+            self.cfg.count("responses")
+            if self._maybe_429("responses"):
+                return
+            if not payload.get("stream"):
+                self._delay()
+            prompt = payload.get("input", "")
+            if not isinstance(prompt, str):
+                prompt = json.dumps(prompt)
+            text = canned_output(prompt, self.cfg)
+            body = {
+                "id": f"resp_fake_{time.time_ns()}",
+                "object": "response",
+                "created_at": int(time.time()),
+                "model": payload.get("model", "gpt-4o-mini"),
+                "status": "completed",
+                "output": [{
+                    "type": "message",
+                    "id": "msg_fake",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [{"type": "output_text", "text": text, "annotations": []}],
+                }],
+                "parallel_tool_calls": True,
+                "tool_choice": "auto",
+                "tools": [],
+                "usage": {
+                    "input_tokens": len(prompt) // 4,
+                    "input_tokens_details": {"cached_tokens": 0},
+                    "output_tokens": len(text) // 4,
+                    "output_tokens_details": {"reasoning_tokens": 0},
+                    "total_tokens": (len(prompt) + len(text)) // 4,
+                },
+            }
+            if payload.get("stream"):
+                self.cfg.count("responses:stream")
+                self._stream(body, text)
+            else:
+                self._send(200, json.dumps(body).encode(), "application/json")
+        elif path.endswith("/audio/speech"):
+            self.cfg.count("speech")
+            if self._maybe_429("speech"):
+                return
+            self._delay()
+            audio = FRAME * (len(payload.get("input", "")) * FRAMES_PER_CHAR)
+            self._send(200, audio, "audio/mpeg")
+        else:
+            self._send(404, b"{}", "application/json")
+
+
+def start_server(cfg: FakeConfig, port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start the fake on a background thread; port 0 picks a free port (see server.server_port).
+    """
+    handler = type("BoundHandler", (Handler,), {"cfg": cfg})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI server for offline runs.")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--episode-words", type=int, default=1450, help="words per episode in 4-episode output")
+    args = parser.parse_args()
+
+    cfg = FakeConfig(args.latency, args.jitter, args.rate_limit, args.episode_words)
+    server = start_server(cfg, args.port)
+    print(f"Fake OpenAI listening on http://127.0.0.1:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Build many weeks from the index in one job.
+
+Usage:
+  python src/backfill.py --from 2026-01-05 --to 2026-03-30
+  python src/backfill.py --weeks 2,3,10-14
+
+Each week is built into dist/backfill/<tag>/ with its own stage manifest, and
+finished weeks are recorded in dist/backfill/progress.json, so rerunning the
+same command resumes where it stopped. Fetch, script and TTS calls have separate
+concurrency limits and share RPM/TPM token buckets (see rate_limit.py).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+# Ensure repo root is importable (critical for GitHub Actions)
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src import rate_limit
+from src.run_weekly import TRACE_CHROME, build_week, week_tag
+from src.instrument import tracer
+from src.week_index import WeekIndex, load_week_index
+
+BACKFILL_DIR = Path("dist/backfill")
+
+# Defaults sized for a low-tier OpenAI account; override with env vars.
+FETCH_CONCURRENCY = int(os.getenv("BACKFILL_FETCH_CONCURRENCY", "4"))
+SCRIPT_CONCURRENCY = int(os.getenv("BACKFILL_SCRIPT_CONCURRENCY", "4"))
+TTS_CONCURRENCY = int(os.getenv("BACKFILL_TTS_CONCURRENCY", "8"))
+RESPONSES_RPM = float(os.getenv("OPENAI_RESPONSES_RPM", "500"))
+RESPONSES_TPM = float(os.getenv("OPENAI_RESPONSES_TPM", "200000"))
+SPEECH_RPM = float(os.getenv("OPENAI_SPEECH_RPM", "50"))
+WEEK_WORKERS = int(os.getenv("BACKFILL_WEEK_WORKERS", "4"))
+
+
+def parse_week_numbers(spec: str) -> List[int]:
+    """
+    "2,3,10-14" -> [2, 3, 10, 11, 12, 13, 14]
+    """
+    nums: List[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            nums.extend(range(int(lo), int(hi) + 1))
+        else:
+            nums.append(int(part))
+    return nums
+
+
+def select_weeks(
+    index: WeekIndex,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    numbers: Optional[List[int]] = None,
+    year: Optional[int] = None,
+) -> list[dict]:
+    if numbers:
+        found = [index.week_by_number(n, year) for n in numbers]
+        return [wk for wk in found if wk]
+    return index.weeks_between(start, end)
+
+
+class Progress:
+    """
+    dist/backfill/progress.json: week tag -> "done" or the last error.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state: dict[str, str] = {}
+        if path.exists():
+            self.state = json.loads(path.read_text(encoding="utf-8"))
+
+    def done(self, tag: str) -> bool:
+        return self.state.get(tag) == "done"
+
+    def mark(self, tag: str, status: str) -> None:
+        with self._lock:
+            self.state[tag] = status
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.tmp")
+            tmp.write_text(json.dumps(self.state, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+
+def configure_limits() -> None:
+    rate_limit.configure("fetch", concurrency=FETCH_CONCURRENCY)
+    rate_limit.configure("responses", concurrency=SCRIPT_CONCURRENCY, rpm=RESPONSES_RPM, tpm=RESPONSES_TPM)
+    rate_limit.configure("speech", concurrency=TTS_CONCURRENCY, rpm=SPEECH_RPM)
+
+
+def backfill(weeks: list[dict], out_dir: Path = BACKFILL_DIR, workers: int = WEEK_WORKERS) -> list[str]:
+    """
+    Build every week not already marked done. Returns the tags that failed.
+    """
+    from src.cfm_fetch import prefetch_index
+
+    configure_limits()
+    progress = Progress(out_dir / "progress.json")
+    todo = [wk for wk in weeks if not progress.done(week_tag(wk))]
+    print(f"BACKFILL: {len(weeks)} week(s) selected, {len(weeks) - len(todo)} already done")
+
+    # Warm the page cache up front; each build then gets a cheap 304 revalidation.
+    prefetch_index(todo, workers=FETCH_CONCURRENCY)
+
+    def run(week: dict) -> Optional[str]:
+        tag = week_tag(week)
+        try:
+            build_week(week, out_dir / tag)
+        except (Exception, SystemExit) as e:
+            progress.mark(tag, f"failed: {e}")
+            print(f"BACKFILL: {tag} FAILED: {e}")
+            return tag
+        progress.mark(tag, "done")
+        print(f"BACKFILL: {tag} done")
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        failed = [tag for tag in pool.map(run, todo) if tag]
+    return failed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate many CFM weeks at once.")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="first week start date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="last week start date (YYYY-MM-DD)")
+    parser.add_argument("--weeks", help='week numbers, e.g. "2,3,10-14"')
+    parser.add_argument("--year", type=int, help="manual year for --weeks (default: latest indexed)")
+    parser.add_argument("--out", type=Path, default=BACKFILL_DIR)
+    parser.add_argument("--workers", type=int, default=WEEK_WORKERS, help="weeks built at once")
+    args = parser.parse_args(argv)
+
+    if not os.getenv("OPENAI_API_KEY"):
+        raise SystemExit("Missing OPENAI_API_KEY")
+    if not (args.start or args.end or args.weeks):
+        raise SystemExit("Pass --from/--to or --weeks")
+
+    numbers = parse_week_numbers(args.weeks) if args.weeks else None
+    weeks = select_weeks(load_week_index(), args.start, args.end, numbers, args.year)
+    if not weeks:
+        raise SystemExit("No weeks in the index match that selection.")
+
+    try:
+        failed = backfill(weeks, args.out, args.workers)
+    finally:
+        tracer.write(args.out, chrome=TRACE_CHROME)
+        print("Trace summary:\n" + tracer.summary())
+    if failed:
+        raise SystemExit(f"BACKFILL: {len(failed)} week(s) failed: {', '.join(failed)}")
+    print("BACKFILL: done")
+
+
+if __name__ == "__main__":
+    main()
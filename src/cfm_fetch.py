@@ -1,29 +1,139 @@
+import json
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import lxml.html
 
-def fetch_cfm_week_text(url: str, timeout: int = 30) -> str:
+from src.disk_cache import DiskCache, cache_key
+from src.rate_limit import throttle
+from src.instrument import span
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; CFMPersonalPodcast/1.0)"
+}
+
+PAGE_CACHE_DIR = os.getenv("CFM_PAGE_CACHE_DIR", ".cache/cfm")
+PAGE_CACHE_MAX_MB = int(os.getenv("CFM_PAGE_CACHE_MAX_MB", "200"))
+PREFETCH_WORKERS = 8
+
+# Content containers in order of preference, and subtrees that are never content.
+CONTENT_SELECTORS = [
+    "article",
+    "main",
+    "div.manual-page",
+    "div.content",
+    "div.page-content",
+]
+SKIP_TAGS = {"nav", "header", "footer", "aside", "script", "style"}
+# Links in these containers are navigation or "related content" lists (see link_texts).
+LINK_LIST_TAGS = ("nav", "li")
+MAX_TEXT_CHARS = 120_000
+
+_session: Optional[requests.Session] = None
+_page_cache: Optional[DiskCache] = None
+_init_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
     """
-    Fetch and extract readable text from a Come, Follow Me week page.
-    This is a best-effort HTML extraction for personal use.
+    Process-wide session so repeated fetches reuse pooled keep-alive connections.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; CFMPersonalPodcast/1.0)"
-    }
-    resp = requests.get(url, headers=headers, timeout=timeout)
-    resp.raise_for_status()
+    global _session
+    with _init_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=PREFETCH_WORKERS * 2)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+        return _session
+
+
+def get_page_cache() -> DiskCache:
+    """
+    Raw HTML, extracted text and validators (ETag / Last-Modified) per URL.
+    """
+    global _page_cache
+    with _init_lock:
+        if _page_cache is None:
+            _page_cache = DiskCache(PAGE_CACHE_DIR, PAGE_CACHE_MAX_MB * 1024 * 1024, suffix=".json")
+        return _page_cache
+
+
+def _selector_xpath(selector: str) -> str:
+    tag, _, cls = selector.partition(".")
+    if not cls:
+        return f"//{tag}"
+    return f"//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+
+
+_CONTENT_XPATHS = [lxml.html.etree.XPath(_selector_xpath(s)) for s in CONTENT_SELECTORS]
+_LINK_LIST_XPATH = lxml.html.etree.XPath(" | ".join(f"//{tag}//a" for tag in LINK_LIST_TAGS))
+
+
+def _collect_strings(el, out: list) -> None:
+    # Comments and processing instructions have a non-string tag: skip their
+    # text but keep their tail, which belongs to the parent.
+    if isinstance(el.tag, str) and el.text:
+        out.append(el.text)
+    for child in el:
+        if not (isinstance(child.tag, str) and child.tag in SKIP_TAGS):
+            _collect_strings(child, out)
+        if child.tail:
+            out.append(child.tail)
+
+
+def _clean_text(text: str) -> str:
+    # Clean up excessive blank lines
+    text = re.sub(r"\n{3,}", "\n\n", text).strip()
+
+    # Keep it from being absurdly large (rare, but safe)
+    if len(text) > MAX_TEXT_CHARS:
+        text = text[:MAX_TEXT_CHARS] + "\n\n[TRUNCATED]"
+    return text
+
+
+def extract_text(html: str) -> str:
+    """
+    Pull the readable manual text out of a Come, Follow Me page.
+    Parses with lxml directly and walks only the chosen content container,
+    skipping non-content subtrees instead of building and pruning a soup.
+    Produces the same text as extract_text_bs4.
+    """
+    if not html.strip():
+        return ""
+    doc = lxml.html.document_fromstring(html)
+
+    root = doc
+    for xpath in _CONTENT_XPATHS:
+        found = xpath(doc)
+        if found:
+            root = found[0]
+            break
 
-    soup = BeautifulSoup(resp.text, "lxml")
+    strings: list = []
+    _collect_strings(root, strings)
+    text = "\n".join(p for p in (s.strip() for s in strings) if p)
+    return _clean_text(text)
+
+
+def extract_text_bs4(html: str) -> str:
+    """
+    Original BeautifulSoup extraction, kept as the reference for the benchmark.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
 
     # Try common containers first
     candidates = []
-    for selector in [
-        "article",
-        "main",
-        "div.manual-page",
-        "div.content",
-        "div.page-content",
-    ]:
+    for selector in CONTENT_SELECTORS:
         node = soup.select_one(selector)
         if node:
             candidates.append(node)
@@ -31,15 +141,91 @@ def fetch_cfm_week_text(url: str, timeout: int = 30) -> str:
     root = candidates[0] if candidates else soup
 
     # Remove obvious non-content
-    for tag in root.select("nav, header, footer, aside, script, style"):
+    for tag in root.select(", ".join(sorted(SKIP_TAGS))):
         tag.decompose()
 
     text = root.get_text("\n", strip=True)
+    return _clean_text(text)
 
-    # Clean up excessive blank lines
-    text = re.sub(r"\n{3,}", "\n\n", text).strip()
 
-    # Keep it from being absurdly large (rare, but safe)
-    if len(text) > 120_000:
-        text = text[:120_000] + "\n\n[TRUNCATED]"
+def link_texts(html: str) -> set[str]:
+    """
+    Stripped text pieces of the links inside nav and list items, i.e. the lines
+    of extract_text output that may belong to a link list (see compact_source).
+    """
+    if not html.strip():
+        return set()
+    doc = lxml.html.document_fromstring(html)
+    return {s.strip() for a in _LINK_LIST_XPATH(doc) for s in a.itertext() if s.strip()}
+
+
+def cached_link_texts(url: str) -> set[str]:
+    """
+    link_texts for a page in the page cache (empty if it is not cached).
+    """
+    cached = get_page_cache().get(cache_key(url))
+    return link_texts(json.loads(cached)["html"]) if cached else set()
+
+
+def fetch_cfm_week_text(url: str, timeout: int = 30) -> str:
+    """
+    Fetch and extract readable text from a Come, Follow Me week page.
+    This is a best-effort HTML extraction for personal use.
+    A cached copy is revalidated with ETag/Last-Modified; on 304 the cached
+    text is returned without downloading or parsing the page again.
+    """
+    cache = get_page_cache()
+    key = cache_key(url)
+    cached = cache.get(key)
+    entry = json.loads(cached) if cached else None
+
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    with span("fetch", url=url) as sp:
+        with throttle("fetch"):
+            resp = get_session().get(url, headers=headers, timeout=timeout)
+        sp.add("requests")
+        sp.set("status", resp.status_code)
+        sp.add("bytes", len(resp.content))
+        if resp.status_code == 304 and entry:
+            return entry["text"]
+        resp.raise_for_status()
+
+    with span("extract", url=url):
+        text = extract_text(resp.text)
+    entry = {
+        "url": url,
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "html": resp.text,
+        "text": text,
+    }
+    cache.put(key, json.dumps(entry).encode("utf-8"))
     return text
+
+
+def prefetch_index(index: list[dict], workers: int = PREFETCH_WORKERS) -> Dict[str, str]:
+    """
+    Fetch (or revalidate) every week URL in the index concurrently.
+    Returns url -> extracted text; failed URLs are reported and left out.
+    """
+    urls = sorted({wk["url"] for wk in index if wk.get("url")})
+
+    def fetch(url: str):
+        try:
+            return url, fetch_cfm_week_text(url)
+        except requests.RequestException as e:
+            print(f"Prefetch failed: {url} ({e})")
+            return url, None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(fetch, urls))
+
+    texts = {url: text for url, text in results if text is not None}
+    print(f"Prefetched {len(texts)}/{len(urls)} page(s); cache {get_page_cache().stats()}")
+    return texts
@@ -0,0 +1,217 @@
+"""
+Single entry point for the weekly pipeline.
+
+Usage:
+  python src/cli.py all                 # generate, tag, copy media, update RSS, archive to Drive
+  python src/cli.py generate [--week-date 2026-03-02] [--force] [--no-resume]
+  python src/cli.py tag | media | rss   # one publish step (week from PODCAST_TAG and the week index)
+  python src/cli.py prepare [...]       # src/lookahead.py
+  python src/cli.py backfill [...]      # src/backfill.py
+  python src/cli.py archive [...]       # src/drive_upload.py
+
+`all` runs every stage in one process and hands the selected week record from
+stage to stage. Each stage imports its own dependencies, so a run that stops
+early (week already published) never loads the OpenAI SDK, bs4/lxml or mutagen.
+The Drive archive runs last, only when DRIVE_FOLDER_ID is set; its OAuth env is
+checked before generating, and a failed upload is reported as a CI warning but
+does not hold back the published feed.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# Ensure repo root is importable (critical for GitHub Actions)
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+DIST = Path("dist")
+PASSTHROUGH = ("prepare", "backfill", "archive")  # subcommands that wrap another script's CLI
+
+
+def _env_true(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() == "true"
+
+
+def _require_api_key() -> None:
+    if not os.getenv("OPENAI_API_KEY"):
+        raise SystemExit("Missing OPENAI_API_KEY")
+
+
+def _generate(args) -> Optional[dict]:
+    from src.run_weekly import generate
+
+    _require_api_key()
+    print(f"FORCE_REGENERATE={args.force}")
+    return generate(force=args.force, resume=args.resume, week_date=args.week_date, dist=DIST)
+
+
+def cmd_generate(args) -> Optional[dict]:
+    from src.run_weekly import write_trace
+
+    try:
+        return _generate(args)
+    finally:
+        write_trace(DIST)
+
+
+def _ci_warning(title: str, message: str) -> None:
+    """
+    Print a warning; in GitHub Actions also annotate the run and add it to the step summary.
+    """
+    if not os.getenv("GITHUB_ACTIONS"):
+        print(f"WARNING: {title}: {message}")
+        return
+    print(f"::warning title={title}::{message}")
+    summary = os.getenv("GITHUB_STEP_SUMMARY")
+    if summary:
+        with open(summary, "a", encoding="utf-8") as f:
+            f.write(f"### {title}\n\n{message}\n")
+
+
+def _ci_output(name: str, value: str) -> None:
+    """
+    Set a step output for later workflow steps when running in GitHub Actions.
+    """
+    path = os.getenv("GITHUB_OUTPUT")
+    if path:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"{name}={value}\n")
+
+
+def _all(args) -> None:
+    archive_enabled = bool(os.getenv("DRIVE_FOLDER_ID"))
+    if archive_enabled:
+        from src.drive_upload import DRIVE_ROOT_URL, check_config
+
+        check_config(DRIVE_ROOT_URL)
+
+    week = _generate(args)
+    if week is None:
+        return
+
+    from src.feed_profiles import copy_media
+    from src.publish_state import PublishState
+    from src.run_weekly import week_tag
+    from src.tag_mp3s import tag_week
+    from src.update_rss import publish_feeds, week_info
+
+    if not args.repo:
+        raise SystemExit("Missing --repo (or GITHUB_REPOSITORY)")
+    tag = week_tag(week)
+    info = week_info(week)
+    tag_week(DIST, info["num"], info["label"], info["title"])
+    if not copy_media(tag, DIST):
+        raise SystemExit("No MP3s found in dist/ to publish.")
+    publish_feeds(args.repo, tag, info, PublishState())
+    _ci_output("tag", tag)
+
+    if archive_enabled:
+        from src.drive_upload import archive
+
+        try:
+            archive(tag, DIST)
+        except Exception as e:
+            # The feed is already updated; don't lose the publish over the archive.
+            _ci_warning("Drive archive failed",
+                        f"{type(e).__name__}: {e}. Rerun `python src/cli.py archive --tag {tag}`.")
+
+
+def cmd_all(args) -> None:
+    from src.run_weekly import write_trace
+
+    # One trace for the whole run, written last so the archive spans are in it.
+    try:
+        _all(args)
+    finally:
+        write_trace(DIST)
+
+
+def cmd_tag(args) -> None:
+    from src import tag_mp3s
+
+    tag_mp3s.main()
+
+
+def cmd_media(args) -> None:
+    from src import feed_profiles
+
+    feed_profiles.main()
+
+
+def cmd_rss(args) -> None:
+    from src import update_rss
+
+    update_rss.main()
+
+
+def cmd_prepare(args) -> None:
+    from src import lookahead
+
+    lookahead.main(args.rest)
+
+
+def cmd_backfill(args) -> None:
+    from src import backfill
+
+    backfill.main(args.rest)
+
+
+def cmd_archive(args) -> None:
+    from src import drive_upload
+
+    drive_upload.main(args.rest)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="CFM Personal Podcast pipeline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_generate_args(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--week-date", default=os.getenv("WEEK_DATE", "").strip(),
+                       help="date inside the week to build (default: next Monday, America/Chicago)")
+        p.add_argument("--force", action="store_true", default=_env_true("FORCE_REGENERATE"),
+                       help="rebuild even if the week is already published")
+        p.add_argument("--no-resume", dest="resume", action="store_false", default=_env_true("RESUME", "true"),
+                       help="ignore dist/manifest.json and prepared artifacts")
+
+    p = sub.add_parser("all", help="generate, tag, copy media and update RSS in one process")
+    add_generate_args(p)
+    p.add_argument("--repo", default=os.getenv("GITHUB_REPOSITORY", ""), help="OWNER/REPO for feed URLs")
+    p.set_defaults(func=cmd_all)
+
+    p = sub.add_parser("generate", help="build the week's scripts and MP3s into dist/")
+    add_generate_args(p)
+    p.set_defaults(func=cmd_generate)
+
+    sub.add_parser("tag", help="retag dist/ MP3s").set_defaults(func=cmd_tag)
+    sub.add_parser("media", help="copy dist/ MP3s into docs/media").set_defaults(func=cmd_media)
+    sub.add_parser("rss", help="add docs/media MP3s to the feeds").set_defaults(func=cmd_rss)
+
+    for name, func, help_text in (
+        ("prepare", cmd_prepare, "prepare upcoming weeks (src/lookahead.py)"),
+        ("backfill", cmd_backfill, "build many weeks (src/backfill.py)"),
+        ("archive", cmd_archive, "upload a week's scripts and MP3s to Drive (src/drive_upload.py)"),
+    ):
+        p = sub.add_parser(name, help=help_text, add_help=False)
+        p.add_argument("rest", nargs=argparse.REMAINDER)
+        p.set_defaults(func=func)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser()
+    if argv and argv[0] in PASSTHROUGH:
+        # Everything after the command goes to the wrapped script as is
+        # (argparse.REMAINDER would drop a leading --option).
+        args = parser.parse_args(argv[:1])
+        args.rest = argv[1:]
+    else:
+        args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
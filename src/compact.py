@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+from typing import Collection
+
+from src.rate_limit import estimate_tokens
+
+# Upper bound on CFM source tokens passed to build_prompt (0 disables trimming).
+CFM_TOKEN_BUDGET = int(os.getenv("CFM_TOKEN_BUDGET", "30000"))
+TOKENIZER_ENCODING = os.getenv("CFM_TOKENIZER_ENCODING", "o200k_base")  # gpt-4o family
+
+# Repeated blocks shorter than this are kept: inline links split sentences into
+# short fragments ("and", "verse 3") that legitimately repeat.
+DEDUPE_MIN_WORDS = 4
+# A run of at least this many short, unpunctuated lines that are all link text
+# from nav or list items (cfm_fetch.link_texts) is a link list.
+LINK_RUN_MIN = 5
+LINK_RUN_MAX_WORDS = 4
+HEADING_MAX_WORDS = 12
+
+BOILERPLATE = re.compile(
+    r"^(?:"
+    r"(?:image|illustration|photo(?:graph)?|painting|artwork|art)\s*(?:by\b|courtesy\b|:|©).*"
+    r"|.*(?:©|intellectual reserve|all rights reserved).*"
+    r"|download|print|share|copy link|sign in|sign out|menu|close|search|listen|play"
+    r"|next|previous|back to top|related content|read more|learn more|see also"
+    r"|page \d+(?: of \d+)?"
+    r")$",
+    re.IGNORECASE,
+)
+
+SCRIPTURE_BOOKS = (
+    "Genesis|Exodus|Leviticus|Numbers|Deuteronomy|Joshua|Judges|Ruth|Samuel|Kings|Chronicles"
+    "|Ezra|Nehemiah|Esther|Job|Psalms?|Proverbs|Ecclesiastes|Song of Solomon|Isaiah|Jeremiah"
+    "|Lamentations|Ezekiel|Daniel|Hosea|Joel|Amos|Obadiah|Jonah|Micah|Nahum|Habakkuk"
+    "|Zephaniah|Haggai|Zechariah|Malachi|Matthew|Mark|Luke|John|Acts|Romans|Corinthians"
+    "|Galatians|Ephesians|Philippians|Colossians|Thessalonians|Timothy|Titus|Philemon"
+    "|Hebrews|James|Peter|Jude|Revelation|Nephi|Jacob|Enos|Jarom|Omni|Words of Mormon"
+    "|Mosiah|Alma|Helaman|Mormon|Ether|Moroni|Doctrine and Covenants|D&C|Moses|Abraham"
+    "|Joseph Smith—Matthew|Joseph Smith—History|Articles of Faith|Official Declaration"
+)
+# "Genesis 1:26-27", "1 Nephi 3:7", "Doctrine and Covenants 76", "Moses 1", "D&C 4:2"
+SCRIPTURE_REF = re.compile(rf"\b(?:[1-4]\s)?(?:{SCRIPTURE_BOOKS})\.?\s\d+(?::\d+(?:[–-]\d+)?)?")
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """
+    tiktoken encoding for token counts, or None (length estimate) when tiktoken
+    or its encoding file is unavailable.
+    """
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+            except Exception as e:
+                print(f"Tokenizer unavailable ({type(e).__name__}); estimating tokens from length")
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    enc = _get_encoding()
+    if enc is None:
+        return estimate_tokens(text)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def _normalize(line: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", line.lower()).split())
+
+
+def is_heading(line: str) -> bool:
+    words = line.split()
+    return (
+        0 < len(words) <= HEADING_MAX_WORDS
+        and (line[0].isupper() or line[0].isdigit())
+        and line[-1] not in ".!?,;:\"”'’)"
+    )
+
+
+def has_scripture_ref(line: str) -> bool:
+    return SCRIPTURE_REF.search(line) is not None
+
+
+def _link_runs(lines: list[str], links: Collection[str]) -> set[int]:
+    """
+    Indexes of lines in runs of LINK_RUN_MIN+ short, unpunctuated lines with no
+    scripture reference that all appear in `links` (navigation and "related
+    content" lists). A paragraph broken up by inline links is kept.
+    """
+    drop: set[int] = set()
+    run: list[int] = []
+    for i, line in enumerate(lines + [""]):
+        short = (
+            line in links
+            and len(line.split()) <= LINK_RUN_MAX_WORDS
+            and line[-1] not in ".!?:"
+            and not has_scripture_ref(line)
+        )
+        if short:
+            run.append(i)
+            continue
+        if len(run) >= LINK_RUN_MIN:
+            drop.update(run)
+        run = []
+    return drop
+
+
+def compact_source(
+    text: str, budget: int | None = None, link_texts: Collection[str] = ()
+) -> tuple[str, dict]:
+    """
+    Shrink fetched CFM text before it goes into the prompt: drop boilerplate
+    (captions, credits, UI labels, link lists) and repeated blocks, then, if it
+    is still over `budget` tokens, keep headings and lines with scripture
+    references first and fill the rest with body text in page order.
+    Link lists are only recognized among `link_texts` (cfm_fetch.link_texts of
+    the page); without them no runs of lines are dropped as link lists.
+    Returns the compacted text (lines in their original order) and size stats.
+    """
+    budget = CFM_TOKEN_BUDGET if budget is None else budget
+    lines = [ln.strip() for ln in text.splitlines()]
+    links = _link_runs(lines, link_texts)
+
+    kept: list[tuple[int, str]] = []
+    seen: set[str] = set()
+    dropped_boilerplate = dropped_duplicates = 0
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        if i in links or BOILERPLATE.match(line):
+            dropped_boilerplate += 1
+            continue
+        if len(line.split()) >= DEDUPE_MIN_WORDS:
+            norm = _normalize(line)
+            if norm in seen:
+                dropped_duplicates += 1
+                continue
+            seen.add(norm)
+        kept.append((i, line))
+
+    # +1 per line for the newline joining it to the next.
+    costs = {i: count_tokens(line) + 1 for i, line in kept}
+    dropped_budget = 0
+    if budget and sum(costs.values()) > budget:
+        priority = [(i, ln) for i, ln in kept if is_heading(ln) or has_scripture_ref(ln)]
+        rest = [(i, ln) for i, ln in kept if not (is_heading(ln) or has_scripture_ref(ln))]
+        chosen: set[int] = set()
+        used = 0
+        for i, _ in priority:
+            if used + costs[i] <= budget:
+                chosen.add(i)
+                used += costs[i]
+        # Body text is cut at the first line that doesn't fit, not cherry-picked.
+        for i, _ in rest:
+            if used + costs[i] > budget:
+                break
+            chosen.add(i)
+            used += costs[i]
+        dropped_budget = len(kept) - len(chosen)
+        kept = [(i, ln) for i, ln in kept if i in chosen]
+
+    out = "\n".join(ln for _, ln in kept)
+    stats = {
+        "chars_before": len(text),
+        "chars_after": len(out),
+        "tokens_before": count_tokens(text),
+        "tokens_after": count_tokens(out),
+        "dropped_boilerplate": dropped_boilerplate,
+        "dropped_duplicates": dropped_duplicates,
+        "dropped_budget": dropped_budget,
+    }
+    return out, stats
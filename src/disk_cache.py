@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+EVICT_TO = 0.9  # fraction of the limits an eviction brings the cache down to
+
+
+def cache_key(*parts: str) -> str:
+    """
+    Stable content hash for a tuple of strings (used as the cache filename).
+    """
+    h = hashlib.sha256()
+    for p in parts:
+        data = p.encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ.
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class DiskCache:
+    """
+    Content-addressed byte cache stored as one file per key under `root`.
+    A file's mtime records when it was written (for ttl_seconds) and its atime
+    when it was last read; eviction drops the least-recently-used entries once
+    the total passes max_bytes or the count passes max_entries. The totals are
+    scanned from disk on the first write and kept running after that, so the
+    tree is only rescanned when a write actually takes the cache over a limit.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int,
+        suffix: str = ".bin",
+        ttl_seconds: float | None = None,
+        max_entries: int | None = None,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._bytes: int | None = None  # running totals; None until the first write scans
+        self._entries = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.suffix}"
+
+    def _fresh_path(self, key: str) -> Path | None:
+        path = self._path(key)
+        try:
+            st = path.stat()
+            if self.ttl_seconds is not None and time.time() - st.st_mtime > self.ttl_seconds:
+                path.unlink()
+                return None
+        except FileNotFoundError:
+            return None
+        # Set atime explicitly (noatime mounts never update it) so LRU eviction
+        # sees this entry as recently used; mtime keeps the write time for TTL.
+        try:
+            os.utime(path, (time.time(), st.st_mtime))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> bytes | None:
+        path = self._fresh_path(key)
+        data = None
+        if path is not None:
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                pass  # evicted by another writer in between
+        self._count(data is not None)
+        return data
+
+    def get_file(self, key: str, dest: str | Path) -> bool:
+        """
+        Copy a cached entry to dest without loading it into memory. Returns False on a miss.
+        """
+        path = self._fresh_path(key)
+        ok = False
+        if path is not None:
+            try:
+                shutil.copyfile(path, dest)
+                ok = True
+            except FileNotFoundError:
+                pass
+        self._count(ok)
+        return ok
+
+    def _tmp_path(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def _over(self, total: int, count: int, scale: float = 1.0) -> bool:
+        return total > self.max_bytes * scale or (
+            self.max_entries is not None and count > self.max_entries * scale
+        )
+
+    def _replace(self, tmp: Path, path: Path) -> None:
+        """
+        Move a written tmp file into place, update the running totals and evict
+        if they are now over a limit.
+        """
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = None
+        os.replace(tmp, path)
+        size = path.stat().st_size
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += size - (replaced or 0)
+                self._entries += replaced is None
+                over = self._over(self._bytes, self._entries)
+            else:
+                over = True  # first write: let evict() scan the totals
+        if over:
+            self.evict()
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        tmp = self._tmp_path(path)
+        tmp.write_bytes(data)
+        self._replace(tmp, path)
+
+    def put_file(self, key: str, src: str | Path) -> None:
+        path = self._path(key)
+        tmp = self._tmp_path(path)
+        shutil.copyfile(src, tmp)
+        self._replace(tmp, path)
+
+    def evict(self) -> None:
+        """
+        Scan the tree; if it is over a limit, drop least-recently-used entries
+        until it is under EVICT_TO of both, so the next writes don't rescan at
+        once. Resets the running totals.
+        """
+        entries = []
+        total = 0
+        for p in self.root.glob(f"*/*{self.suffix}"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((max(st.st_atime, st.st_mtime), st.st_size, p))
+            total += st.st_size
+        count = len(entries)
+
+        if self._over(total, count):
+            for _, size, p in sorted(entries):
+                try:
+                    p.unlink()
+                except FileNotFoundError:
+                    continue
+                total -= size
+                count -= 1
+                if not self._over(total, count, EVICT_TO):
+                    break
+        with self._lock:
+            self._bytes, self._entries = total, count
+
+    def stats(self) -> str:
+        return f"{self.hits} hit(s), {self.misses} miss(es)"
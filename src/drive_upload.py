@@ -1,32 +1,84 @@
+"""
+Google Drive helpers and the weekly archive stage.
+
+Usage:
+  python src/drive_upload.py [--tag week-2026-03-02] [--dist dist]
+
+archive_week uploads a week's scripts and MP3s (every feed profile) from dist/
+into DRIVE_FOLDER_ID/<tag>/ (other profiles in <tag>/<name>/). Files stream
+from disk: small ones in one multipart request, larger ones as resumable
+uploads in DRIVE_CHUNK_MB chunks, DRIVE_UPLOAD_WORKERS at a time. Folder IDs are
+cached in .cache/drive_folders.json; folder lookups, folder creation and
+listings go through the Drive batch endpoint. Files already in Drive with the
+same md5 are skipped, so a rerun only sends what changed.
+
+DRIVE_ROOT_URL points the API, upload and batch URLs at another server
+(bench/fake_drive.py); without OAuth env vars, requests to it are unauthenticated.
+"""
+import argparse
+import hashlib
 import io
+import json
+import mimetypes
 import os
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional
+
+# Ensure repo root is importable when run as a script
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.instrument import span
 
 SCOPES = ["https://www.googleapis.com/auth/drive.file"]
+FOLDER_MIME = "application/vnd.google-apps.folder"
 
-def get_drive_service_oauth():
+DRIVE_FOLDER_ID = os.getenv("DRIVE_FOLDER_ID", "").strip()
+DRIVE_ROOT_URL = os.getenv("DRIVE_ROOT_URL", "").strip()
+# Resumable chunks must be a multiple of 256 KiB; files up to DRIVE_RESUMABLE_MB
+# go in a single multipart request instead.
+DRIVE_CHUNK_MB = int(os.getenv("DRIVE_CHUNK_MB", "8"))
+DRIVE_RESUMABLE_MB = int(os.getenv("DRIVE_RESUMABLE_MB", "5"))
+DRIVE_UPLOAD_WORKERS = int(os.getenv("DRIVE_UPLOAD_WORKERS", "4"))
+DRIVE_RETRIES = int(os.getenv("DRIVE_RETRIES", "3"))
+FOLDER_CACHE_PATH = Path(os.getenv("DRIVE_FOLDER_CACHE", ".cache/drive_folders.json"))
+
+MB = 1024 * 1024
+BATCH_MAX = 100  # Drive's limit on calls per batch request
+
+
+def check_config(root_url: str = "") -> None:
+    """
+    Exit if the OAuth env vars are missing (not needed for a fake server at
+    root_url), so a broken setup stops a run before any work is done.
+    """
+    if root_url and not os.getenv("GOOGLE_OAUTH_REFRESH_TOKEN"):
+        return
+    missing = [k for k in ("GOOGLE_OAUTH_CLIENT_ID", "GOOGLE_OAUTH_CLIENT_SECRET", "GOOGLE_OAUTH_REFRESH_TOKEN")
+               if not os.getenv(k)]
+    if missing:
+        raise SystemExit(f"Missing OAuth env vars: {', '.join(missing)}")
+
+
+def _oauth_credentials():
     """
-    Builds a Drive service using OAuth refresh token (works with personal Gmail Drive).
+    OAuth credentials from the refresh token (works with personal Gmail Drive).
     Requires env vars:
       GOOGLE_OAUTH_CLIENT_ID
       GOOGLE_OAUTH_CLIENT_SECRET
       GOOGLE_OAUTH_REFRESH_TOKEN
     """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
+    check_config()
     client_id = os.getenv("GOOGLE_OAUTH_CLIENT_ID")
     client_secret = os.getenv("GOOGLE_OAUTH_CLIENT_SECRET")
     refresh_token = os.getenv("GOOGLE_OAUTH_REFRESH_TOKEN")
 
-    missing = [k for k, v in [
-        ("GOOGLE_OAUTH_CLIENT_ID", client_id),
-        ("GOOGLE_OAUTH_CLIENT_SECRET", client_secret),
-        ("GOOGLE_OAUTH_REFRESH_TOKEN", refresh_token),
-    ] if not v]
-    if missing:
-        raise SystemExit(f"Missing OAuth env vars: {', '.join(missing)}")
-
     creds = Credentials(
         token=None,
         refresh_token=refresh_token,
@@ -38,36 +90,86 @@ def get_drive_service_oauth():
 
     # Ensure we have a valid access token
     creds.refresh(Request())
+    return creds
 
-    return build("drive", "v3", credentials=creds, cache_discovery=False)
 
-def find_or_create_folder(service, name: str, parent_id: str) -> str:
+def get_drive_service_oauth():
+    """
+    Builds a Drive service using OAuth refresh token (see _oauth_credentials).
+    """
+    from googleapiclient.discovery import build
+
+    return build("drive", "v3", credentials=_oauth_credentials(), cache_discovery=False)
+
+
+def http_factory(root_url: str = DRIVE_ROOT_URL) -> Callable:
+    """
+    Makes the httplib2.Http objects DriveArchive gives each worker thread
+    (httplib2 is not thread-safe). They share one set of OAuth credentials,
+    refreshed once here.
+    """
+    # build_http keeps 308 (resumable "chunk received") from being followed as a redirect.
+    from googleapiclient.http import build_http
+
+    if root_url and not os.getenv("GOOGLE_OAUTH_REFRESH_TOKEN"):
+        return build_http
+
+    from google_auth_httplib2 import AuthorizedHttp
+
+    creds = _oauth_credentials()
+    return lambda: AuthorizedHttp(creds, http=build_http())
+
+
+def build_drive_service(http, root_url: str = DRIVE_ROOT_URL):
+    """
+    Drive v3 from the discovery document bundled with google-api-python-client
+    (no discovery request). The API base, media upload and batch URLs all derive
+    from rootUrl, so replacing it moves every endpoint to `root_url`.
+    """
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+
+    doc = json.loads(get_static_doc("drive", "v3"))
+    if root_url:
+        doc["rootUrl"] = root_url.rstrip("/") + "/"
+        doc["baseUrl"] = doc["rootUrl"] + doc["servicePath"]
+    return build_from_document(doc, http=http)
+
+
+def _folder_query(name: str, parent_id: str) -> str:
     safe_name = name.replace("'", "")
-    q = (
-        "mimeType='application/vnd.google-apps.folder' "
+    return (
+        f"mimeType='{FOLDER_MIME}' "
         f"and name='{safe_name}' "
         f"and '{parent_id}' in parents "
         "and trashed=false"
     )
-    res = service.files().list(q=q, fields="files(id,name)").execute()
+
+
+def find_or_create_folder(service, name: str, parent_id: str) -> str:
+    res = service.files().list(q=_folder_query(name, parent_id), fields="files(id,name)").execute()
     files = res.get("files", [])
     if files:
         return files[0]["id"]
 
     meta = {
         "name": name,
-        "mimeType": "application/vnd.google-apps.folder",
+        "mimeType": FOLDER_MIME,
         "parents": [parent_id],
     }
     created = service.files().create(body=meta, fields="id").execute()
     return created["id"]
 
+
 def upload_bytes(service, parent_id: str, filename: str, content: bytes, mime_type: str) -> str:
+    from googleapiclient.http import MediaIoBaseUpload
+
     media = MediaIoBaseUpload(io.BytesIO(content), mimetype=mime_type, resumable=True)
     meta = {"name": filename, "parents": [parent_id]}
     created = service.files().create(body=meta, media_body=media, fields="id").execute()
     return created["id"]
 
+
 def upload_text(service, parent_id: str, filename: str, text: str) -> str:
     return upload_bytes(
         service,
@@ -76,3 +178,260 @@ def upload_text(service, parent_id: str, filename: str, text: str) -> str:
         content=text.encode("utf-8"),
         mime_type="text/plain",
     )
+
+
+def file_md5(path: Path) -> str:
+    h = hashlib.md5()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(MB), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FolderCache:
+    """
+    .cache/drive_folders.json: "<parent id>/<name>" -> Drive folder ID.
+    """
+
+    def __init__(self, path: Path = FOLDER_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.ids: dict[str, str] = {}
+        if path.exists():
+            self.ids = json.loads(path.read_text(encoding="utf-8"))
+
+    def get(self, parent_id: str, name: str) -> Optional[str]:
+        return self.ids.get(f"{parent_id}/{name}")
+
+    def set(self, parent_id: str, name: str, folder_id: str) -> None:
+        with self._lock:
+            self.ids[f"{parent_id}/{name}"] = folder_id
+
+    def clear(self) -> None:
+        with self._lock:
+            self.ids = {}
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.tmp")
+            tmp.write_text(json.dumps(self.ids, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+
+class DriveArchive:
+    """
+    Folder lookups (batched, cached) and concurrent file uploads for one run.
+    Each thread sends its requests over its own Http from `make_http`.
+    """
+
+    def __init__(
+        self,
+        make_http: Callable,
+        folders: Optional[FolderCache] = None,
+        root_url: str = DRIVE_ROOT_URL,
+        workers: int = DRIVE_UPLOAD_WORKERS,
+        chunk_size: int = DRIVE_CHUNK_MB * MB,
+        resumable_min: int = DRIVE_RESUMABLE_MB * MB,
+    ):
+        self._make_http = make_http
+        self._local = threading.local()
+        self.folders = folders or FolderCache()
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.resumable_min = resumable_min
+        self.service = build_drive_service(self.http(), root_url)
+
+    def http(self):
+        h = getattr(self._local, "http", None)
+        if h is None:
+            h = self._local.http = self._make_http()
+        return h
+
+    def batch(self, requests: list) -> list[dict]:
+        """
+        Execute requests through the batch endpoint, BATCH_MAX per HTTP call.
+        Returns the responses in order; raises the first failed call's error.
+        """
+        results: list = [None] * len(requests)
+
+        def callback(request_id, response, exception):
+            results[int(request_id)] = exception or response
+
+        for start in range(0, len(requests), BATCH_MAX):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for i in range(start, min(start + BATCH_MAX, len(requests))):
+                batch.add(requests[i], request_id=str(i))
+            with span("drive.batch", calls=min(BATCH_MAX, len(requests) - start)):
+                batch.execute(http=self.http())
+        for res in results:
+            if isinstance(res, Exception):
+                raise res
+        return results
+
+    def ensure_folders(self, parent_id: str, names: List[str]) -> dict[str, str]:
+        """
+        Folder IDs for `names` under `parent_id`: from the cache, else found or
+        created with one batch call each for the lookups and the creates.
+        """
+        ids = {name: self.folders.get(parent_id, name) for name in names}
+        missing = [name for name, fid in ids.items() if not fid]
+        if not missing:
+            return ids
+
+        files = self.service.files()
+        found = self.batch([files.list(q=_folder_query(name, parent_id), fields="files(id,name)")
+                            for name in missing])
+        create = []
+        for name, res in zip(missing, found):
+            if res.get("files"):
+                ids[name] = res["files"][0]["id"]
+            else:
+                create.append(name)
+        if create:
+            created = self.batch([
+                files.create(body={"name": name, "mimeType": FOLDER_MIME, "parents": [parent_id]}, fields="id")
+                for name in create
+            ])
+            for name, res in zip(create, created):
+                ids[name] = res["id"]
+
+        for name in missing:
+            self.folders.set(parent_id, name, ids[name])
+        self.folders.save()
+        return ids
+
+    def list_files(self, folder_ids: List[str]) -> dict[str, dict[str, dict]]:
+        """
+        folder ID -> file name -> {id, md5Checksum}, one batch call for all folders.
+        """
+        files = self.service.files()
+        listed = self.batch([
+            files.list(q=f"'{fid}' in parents and trashed=false",
+                       fields="files(id,name,md5Checksum)", pageSize=1000)
+            for fid in folder_ids
+        ])
+        return {fid: {f["name"]: f for f in res.get("files", [])} for fid, res in zip(folder_ids, listed)}
+
+    def upload_file(self, parent_id: str, path: Path, file_id: Optional[str] = None) -> dict:
+        """
+        Upload `path` into `parent_id` (or as a new revision of `file_id`) straight
+        from disk; above resumable_min it goes in chunk_size pieces.
+        """
+        from googleapiclient.http import MediaFileUpload
+
+        mime_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        size = path.stat().st_size
+        media = MediaFileUpload(str(path), mimetype=mime_type, chunksize=self.chunk_size,
+                                resumable=size > self.resumable_min)
+        files = self.service.files()
+        if file_id:
+            request = files.update(fileId=file_id, media_body=media, fields="id,md5Checksum")
+        else:
+            request = files.create(body={"name": path.name, "parents": [parent_id]},
+                                   media_body=media, fields="id,md5Checksum")
+
+        http = self.http()
+        with span("drive.upload", file=path.name, bytes=size) as sp:
+            if not media.resumable():
+                return request.execute(http=http, num_retries=DRIVE_RETRIES)
+            response = None
+            while response is None:
+                _, response = request.next_chunk(http=http, num_retries=DRIVE_RETRIES)
+                sp.add("chunks")
+            return response
+
+    def upload_many(self, jobs: List[tuple]) -> None:
+        """
+        Run upload_file(parent_id, path, file_id) for every job, `workers` at a time.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for future in [pool.submit(self.upload_file, *job) for job in jobs]:
+                future.result()
+
+
+def archive_files(dist: Path, profiles) -> dict[str, List[Path]]:
+    """
+    Week folder subpath ("" for the week folder itself) -> files to archive:
+    the scripts and the primary MP3s at the top, other profiles' MP3s in their
+    own subfolders.
+    """
+    groups: dict[str, List[Path]] = {}
+    for profile in profiles:
+        paths = sorted(profile.dist_dir(dist).glob("W*_E*.mp3"))
+        if profile.primary:
+            paths = [dist / "all_episodes.txt", *sorted(dist.glob("W*_E*.txt")), *paths]
+        groups[profile.subdir] = [p for p in paths if p.exists()]
+    return groups
+
+
+def archive_week(tag: str, dist: Path, root_id: str, archive: DriveArchive, profiles=None) -> dict:
+    """
+    Upload the week's files into <root_id>/<tag>/, skipping files Drive already
+    has with the same md5. A changed file becomes a new revision of the old one.
+    Returns counts of uploaded and skipped files and bytes sent.
+    """
+    from googleapiclient.errors import HttpError
+
+    from src.feed_profiles import load_profiles
+
+    groups = archive_files(dist, profiles or load_profiles())
+    try:
+        return _archive(tag, groups, root_id, archive)
+    except HttpError as e:
+        if e.resp.status != 404:
+            raise
+        # A cached folder was deleted in Drive: look the folders up again.
+        print(f"DRIVE: {e.resp.status} from Drive, refreshing cached folder IDs")
+        archive.folders.clear()
+        return _archive(tag, groups, root_id, archive)
+
+
+def _archive(tag: str, groups: dict[str, List[Path]], root_id: str, archive: DriveArchive) -> dict:
+    week_id = archive.ensure_folders(root_id, [tag])[tag]
+    subdirs = [s for s in groups if s]
+    folder_ids = {"": week_id, **archive.ensure_folders(week_id, subdirs)}
+    existing = archive.list_files(list(folder_ids.values()))
+
+    jobs = []
+    stats = {"uploaded": 0, "skipped": 0, "bytes": 0}
+    for subdir, paths in groups.items():
+        fid = folder_ids[subdir]
+        for path in paths:
+            remote = existing[fid].get(path.name)
+            if remote and remote.get("md5Checksum") == file_md5(path):
+                stats["skipped"] += 1
+                continue
+            jobs.append((fid, path, remote["id"] if remote else None))
+            stats["uploaded"] += 1
+            stats["bytes"] += path.stat().st_size
+    archive.upload_many(jobs)
+    return stats
+
+
+def archive(tag: str, dist: Path = Path("dist")) -> dict:
+    """
+    Archive stage: archive_week into DRIVE_FOLDER_ID with the env settings.
+    """
+    if not DRIVE_FOLDER_ID:
+        raise SystemExit("Missing DRIVE_FOLDER_ID")
+    with span("stage.archive", week=tag):
+        stats = archive_week(tag, dist, DRIVE_FOLDER_ID, DriveArchive(http_factory()))
+    print(f"DRIVE: {tag}: uploaded {stats['uploaded']} file(s) ({stats['bytes'] / MB:.1f} MB), "
+          f"skipped {stats['skipped']} unchanged")
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Archive a week's scripts and MP3s to Google Drive.")
+    parser.add_argument("--tag", default=os.getenv("PODCAST_TAG", "").strip(), help="week tag, e.g. week-2026-03-02")
+    parser.add_argument("--dist", type=Path, default=Path("dist"))
+    args = parser.parse_args(argv)
+
+    if not args.tag:
+        raise SystemExit("Missing --tag (or PODCAST_TAG)")
+    archive(args.tag, args.dist)
+
+
+if __name__ == "__main__":
+    main()
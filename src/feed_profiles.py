@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+# Ensure repo root is importable when run as a script
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+PROFILES_PATH = Path(os.getenv("FEED_PROFILES", "feeds.json"))
+MEDIA_ROOT = Path("docs/media")
+
+
+@dataclass(frozen=True)
+class FeedProfile:
+    """
+    One published feed: the voice and TTS model its MP3s are synthesized with,
+    and its RSS path. The primary (first) profile keeps the original layout:
+    dist/*.mp3 and docs/media/<tag>/. Every other profile uses a subdirectory
+    named after it: dist/<name>/ and docs/media/<name>/<tag>/.
+    """
+
+    name: str
+    voice: str = "alloy"
+    model: str = "tts-1"
+    feed: str = "docs/podcast.xml"
+    title: str = ""  # channel title for a new feed; defaults to the primary feed's
+    primary: bool = False
+
+    @property
+    def subdir(self) -> str:
+        return "" if self.primary else self.name
+
+    def dist_dir(self, dist: Path) -> Path:
+        return dist / self.subdir if self.subdir else dist
+
+    def media_dir(self, tag: str) -> Path:
+        return MEDIA_ROOT / self.subdir / tag if self.subdir else MEDIA_ROOT / tag
+
+    def stage(self, i: int) -> str:
+        """
+        Manifest stage name for this profile's MP3 of episode i.
+        """
+        return f"mp3_{i}" if self.primary else f"mp3_{self.name}_{i}"
+
+
+DEFAULT_PROFILES = [FeedProfile("main", primary=True)]
+
+
+def load_profiles(path: Path = PROFILES_PATH) -> list[FeedProfile]:
+    """
+    Feed profiles from feeds.json ({"feeds": [{"name": ..., "voice": ..., ...}]}),
+    or the single default feed if the file is missing. Feed paths must be inside
+    docs/ and names must be plain directory names (they name the media subdirectory).
+    """
+    if not path.exists():
+        return list(DEFAULT_PROFILES)
+    entries = json.loads(path.read_text(encoding="utf-8")).get("feeds") or []
+    if not entries:
+        raise SystemExit(f"{path}: no feeds defined")
+
+    profiles = []
+    for n, entry in enumerate(entries):
+        unknown = set(entry) - {"name", "voice", "model", "feed", "title"}
+        if unknown or not entry.get("name"):
+            raise SystemExit(f"{path}: feed {n + 1} needs a name (unknown keys: {sorted(unknown)})")
+        profiles.append(FeedProfile(primary=n == 0, **entry))
+
+    for profile in profiles:
+        # Published under GitHub Pages: the feed and docs/media/<name>/ must stay in docs/
+        feed = Path(profile.feed)
+        if feed.is_absolute() or ".." in feed.parts or len(feed.parts) < 2 or feed.parts[0] != "docs":
+            raise SystemExit(f"{path}: feed '{profile.name}' path must be inside docs/ (got {profile.feed!r})")
+        if Path(profile.name).name != profile.name or profile.name in (".", ".."):
+            raise SystemExit(f"{path}: feed name {profile.name!r} must be a plain directory name")
+
+    names = [p.name for p in profiles]
+    feeds = [Path(p.feed) for p in profiles]
+    if len(set(names)) != len(names) or len(set(feeds)) != len(feeds):
+        raise SystemExit(f"{path}: feed names and feed paths must be unique")
+    return profiles
+
+
+def copy_media(tag: str, dist: Path = Path("dist"), profiles: list[FeedProfile] | None = None) -> int:
+    """
+    Copy each profile's dist MP3s into its docs/media directory. Returns files copied.
+    """
+    copied = 0
+    for profile in profiles or load_profiles():
+        mp3s = sorted(profile.dist_dir(dist).glob("W*_E*.mp3"))
+        if not mp3s:
+            print(f"Media: no MP3s for feed '{profile.name}'")
+            continue
+        dest = profile.media_dir(tag)
+        dest.mkdir(parents=True, exist_ok=True)
+        for mp3 in mp3s:
+            shutil.copy2(mp3, dest / mp3.name)
+            copied += 1
+        print(f"Media: {len(mp3s)} file(s) for feed '{profile.name}' -> {dest}")
+    return copied
+
+
+def main():
+    tag = os.environ["PODCAST_TAG"]
+    if not copy_media(tag):
+        raise SystemExit("No MP3s found in dist/ to copy.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+# Estimated list prices in USD, for tracking cost trends (not billing).
+# Text models: per 1M input / output tokens. TTS models: per 1M characters.
+TOKEN_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+}
+TTS_CHAR_PRICES = {
+    "tts-1": 15.0,
+    "tts-1-hd": 30.0,
+}
+
+
+class Span:
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = dict(attrs)
+        self.counters: dict[str, float] = {}
+        self.start = time.time()
+        self.seconds = 0.0
+        self.thread = threading.get_ident()
+        self.error: str | None = None
+
+    def set(self, key: str, value) -> None:
+        self.attrs[key] = value
+
+    def add(self, key: str, amount: float = 1) -> None:
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+
+# Spans open in the current thread / asyncio task, innermost last.
+_open_spans: ContextVar[tuple[Span, ...]] = ContextVar("open_spans", default=())
+
+
+class Tracer:
+    """
+    Collects timed spans (with attributes and counters) from every thread.
+    """
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self.counters: dict[str, float] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        sp = Span(name, attrs)
+        token = _open_spans.set(_open_spans.get() + (sp,))
+        t0 = time.perf_counter()
+        try:
+            yield sp
+        except BaseException as e:
+            sp.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            sp.seconds = time.perf_counter() - t0
+            _open_spans.reset(token)
+            with self._lock:
+                self.spans.append(sp)
+
+    def add(self, key: str, amount: float = 1) -> None:
+        """
+        Add to a counter of the innermost span open in the caller's thread or
+        task (for code that doesn't hold the span, e.g. HTTP client hooks), or
+        to the run-level counters when no span is open.
+        """
+        spans = _open_spans.get()
+        if spans:
+            spans[-1].add(key, amount)
+            return
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def totals(self) -> dict:
+        out: dict[str, dict] = {}
+        for sp in self.spans:
+            t = out.setdefault(sp.name, {"count": 0, "seconds": 0.0, "errors": 0})
+            t["count"] += 1
+            t["seconds"] += sp.seconds
+            t["errors"] += 1 if sp.error else 0
+            for k, v in sp.counters.items():
+                t[k] = t.get(k, 0) + v
+        return out
+
+    def estimated_cost(self) -> float:
+        cost = 0.0
+        for sp in self.spans:
+            model = sp.attrs.get("model")
+            if model in TOKEN_PRICES:
+                price_in, price_out = TOKEN_PRICES[model]
+                cost += sp.counters.get("input_tokens", 0) * price_in / 1e6
+                cost += sp.counters.get("output_tokens", 0) * price_out / 1e6
+            elif model in TTS_CHAR_PRICES:
+                cost += sp.counters.get("tts_chars", 0) * TTS_CHAR_PRICES[model] / 1e6
+        return cost
+
+    def to_json(self) -> dict:
+        return {
+            "started": self.started,
+            "wall_seconds": time.time() - self.started,
+            "estimated_cost_usd": round(self.estimated_cost(), 4),
+            "counters": self.counters,
+            "totals": self.totals(),
+            "spans": [
+                {
+                    "name": sp.name,
+                    "start": sp.start - self.started,
+                    "seconds": sp.seconds,
+                    "thread": sp.thread,
+                    "attrs": sp.attrs,
+                    "counters": sp.counters,
+                    "error": sp.error,
+                }
+                for sp in sorted(self.spans, key=lambda s: s.start)
+            ],
+        }
+
+    def to_chrome(self) -> dict:
+        """
+        Chrome trace event format (load in chrome://tracing or Perfetto).
+        """
+        events = []
+        for sp in self.spans:
+            events.append({
+                "name": sp.name,
+                "cat": sp.name.split(".")[0],
+                "ph": "X",
+                "ts": int((sp.start - self.started) * 1e6),
+                "dur": int(sp.seconds * 1e6),
+                "pid": os.getpid(),
+                "tid": sp.thread,
+                "args": {**sp.attrs, **sp.counters, **({"error": sp.error} if sp.error else {})},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, dist: Path, chrome: bool = False) -> None:
+        dist.mkdir(parents=True, exist_ok=True)
+        (dist / "trace.json").write_text(json.dumps(self.to_json(), indent=2, default=str), encoding="utf-8")
+        if chrome:
+            (dist / "trace.chrome.json").write_text(json.dumps(self.to_chrome(), default=str), encoding="utf-8")
+
+    def summary(self) -> str:
+        lines = []
+        for name, t in sorted(self.totals().items()):
+            extra = ", ".join(f"{k}={int(v)}" for k, v in t.items() if k not in ("count", "seconds", "errors"))
+            lines.append(f"  {name}: {t['count']} call(s), {t['seconds']:.1f}s" + (f", {extra}" if extra else ""))
+        if self.counters:
+            lines.append("  outside spans: " + ", ".join(f"{k}={int(v)}" for k, v in sorted(self.counters.items())))
+        lines.append(f"  estimated cost: ${self.estimated_cost():.4f}")
+        return "\n".join(lines)
+
+
+tracer = Tracer()
+span = tracer.span
@@ -0,0 +1,109 @@
+"""
+Prepare upcoming weeks ahead of the weekly publish run.
+
+Usage:
+  python src/lookahead.py                  # the next LOOKAHEAD_WEEKS weeks (default 2)
+  python src/lookahead.py --count 3 --from 2026-03-02
+
+Each upcoming week that is not published yet is built (fetch, scripts, resized
+episodes and MP3s for every feed profile) into .cache/prepared/<tag>/ with its
+stage manifest; the workflow keeps .cache between runs. The weekly run builds
+in the same directory, so every prepared stage is reused and the publish run is
+local I/O only; a missing or partial week is completed there and copied into
+dist/. Published and past weeks are pruned.
+"""
+import argparse
+import os
+import shutil
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+# Ensure repo root is importable (critical for GitHub Actions)
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.backfill import Progress, backfill
+from src.instrument import tracer
+from src.publish_state import PublishState
+from src.run_weekly import TRACE_CHROME, next_monday_local, week_tag
+from src.week_index import WeekIndex, load_week_index
+
+PREPARED_DIR = Path(os.getenv("PREPARED_DIR", ".cache/prepared"))
+LOOKAHEAD_WEEKS = int(os.getenv("LOOKAHEAD_WEEKS", "2"))
+
+
+def upcoming_weeks(index: WeekIndex, start: date, count: int) -> list[dict]:
+    """
+    The week containing `start` and the ones after it, `count` in all.
+    """
+    return [wk for wk in index.weeks if wk["end_date"] >= start.isoformat()][:count]
+
+
+def take_prepared(tag: str, dist: Path, prepared_dir: Path = PREPARED_DIR) -> bool:
+    """
+    Copy a built week's files into dist/ for the publish steps (the manifest
+    stays behind). Returns False if nothing was prepared.
+    """
+    src = prepared_dir / tag
+    if not (src / "manifest.json").exists():
+        return False
+    shutil.copytree(src, dist, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns("trace*.json", "manifest.json*"))
+    return True
+
+
+def prune(state: PublishState, today: date, prepared_dir: Path = PREPARED_DIR) -> None:
+    """
+    Remove prepared weeks that are published or already over.
+    """
+    if not prepared_dir.exists():
+        return
+    progress = Progress(prepared_dir / "progress.json")
+    for path in sorted(p for p in prepared_dir.iterdir() if p.is_dir()):
+        tag = path.name
+        try:
+            start = date.fromisoformat(tag.removeprefix("week-"))
+        except ValueError:
+            continue
+        if state.is_published(tag) or start + timedelta(days=7) < today:
+            shutil.rmtree(path)
+            progress.mark(tag, "pruned")
+            print(f"LOOKAHEAD: pruned {tag}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Prepare upcoming CFM weeks ahead of publishing.")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat,
+                        help="first week to prepare (default: next Monday, America/Chicago)")
+    parser.add_argument("--count", type=int, default=LOOKAHEAD_WEEKS, help="weeks to prepare")
+    parser.add_argument("--out", type=Path, default=PREPARED_DIR)
+    args = parser.parse_args(argv)
+
+    if not os.getenv("OPENAI_API_KEY"):
+        raise SystemExit("Missing OPENAI_API_KEY")
+
+    start = args.start or next_monday_local("America/Chicago")
+    state = PublishState()
+    prune(state, start, args.out)
+
+    weeks = [wk for wk in upcoming_weeks(load_week_index(), start, args.count)
+             if not state.is_published(week_tag(wk))]
+    if not weeks:
+        print("LOOKAHEAD: nothing to prepare")
+        return
+    print(f"LOOKAHEAD: preparing {', '.join(week_tag(wk) for wk in weeks)} in {args.out}")
+
+    try:
+        failed = backfill(weeks, args.out)
+    finally:
+        tracer.write(args.out, chrome=TRACE_CHROME)
+        print("Trace summary:\n" + tracer.summary())
+    if failed:
+        raise SystemExit(f"LOOKAHEAD: {len(failed)} week(s) failed: {', '.join(failed)}")
+    print("LOOKAHEAD: done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+MANIFEST_NAME = "manifest.json"
+
+
+def file_sha256(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class StageManifest:
+    """
+    Checkpoints for one week's run, stored as <dist>/manifest.json (for the
+    weekly run, .cache/prepared/<tag>/, which survives a failed CI job).
+    Each stage records the hash of its inputs and the path + content hash of its
+    output; a stage is reusable only when both still match. A manifest written for
+    a different week tag is discarded.
+    """
+
+    def __init__(self, dist: Path, tag: str, enabled: bool = True):
+        self.path = dist / MANIFEST_NAME
+        self.dist = dist
+        self.tag = tag
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stages: dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except ValueError:
+                data = {}
+            if data.get("tag") == tag:
+                self.stages = data.get("stages", {})
+
+    def fresh(self, stage: str, input_key: str) -> Path | None:
+        """
+        Output path of `stage` if it was completed for `input_key` and is unchanged on disk.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self.stages.get(stage)
+        if not entry or entry.get("input") != input_key:
+            return None
+        out = self.dist / entry["path"]
+        if not out.exists() or file_sha256(out) != entry.get("sha256"):
+            return None
+        return out
+
+    def record(self, stage: str, input_key: str, output: Path) -> None:
+        entry = {
+            "input": input_key,
+            "path": output.relative_to(self.dist).as_posix(),
+            "sha256": file_sha256(output),
+            "bytes": output.stat().st_size,
+        }
+        with self._lock:
+            self.stages[stage] = entry
+            self._save()
+
+    def _save(self) -> None:
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        tmp.write_text(
+            json.dumps({"tag": self.tag, "stages": self.stages}, indent=2, sort_keys=True),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import struct
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+# Bitrates in kbps, indexed by the 4-bit bitrate field.
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# Sample rates indexed by the 2-bit version field (0 = MPEG 2.5, 2 = MPEG 2, 3 = MPEG 1).
+_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+XING_FLAGS = 0x07  # frames + bytes + TOC
+
+
+@dataclass
+class FrameHeader:
+    raw: bytes
+    version_bits: int  # 0 = MPEG 2.5, 2 = MPEG 2, 3 = MPEG 1
+    layer: int  # 1, 2 or 3
+    bitrate_index: int
+    sample_rate: int
+    padding: int
+    mono: bool
+    length: int
+
+    @property
+    def samples(self) -> int:
+        if self.layer == 1:
+            return 384
+        if self.layer == 3 and self.version_bits != 3:
+            return 576
+        return 1152
+
+    @property
+    def side_info_size(self) -> int:
+        if self.version_bits == 3:
+            return 17 if self.mono else 32
+        return 9 if self.mono else 17
+
+
+@dataclass
+class Mp3Info:
+    frames: int
+    audio_bytes: int
+    sample_rate: int
+    samples_per_frame: int
+
+    @property
+    def duration(self) -> float:
+        return self.frames * self.samples_per_frame / self.sample_rate
+
+
+def parse_frame_header(data: bytes, pos: int) -> FrameHeader | None:
+    """
+    Decode the 4-byte MPEG audio frame header at data[pos], or None if it isn't one.
+    """
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version_bits = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    sr_index = (b2 >> 2) & 0x03
+    if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or sr_index == 3:
+        return None
+
+    bitrate = _BITRATES[(1 if version_bits == 3 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sr_index]
+    padding = (b2 >> 1) & 0x01
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version_bits != 3:
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        length = 144 * bitrate // sample_rate + padding
+
+    return FrameHeader(
+        raw=bytes(data[pos:pos + 4]),
+        version_bits=version_bits,
+        layer=layer,
+        bitrate_index=bitrate_index,
+        sample_rate=sample_rate,
+        padding=padding,
+        mono=(b3 >> 6) == 3,
+        length=length,
+    )
+
+
+def _id3v2_size(data: bytes, pos: int = 0) -> int:
+    if data[pos:pos + 3] != b"ID3" or len(data) < pos + 10:
+        return 0
+    size = 0
+    for b in data[pos + 6:pos + 10]:
+        size = (size << 7) | (b & 0x7F)
+    footer = 10 if data[pos + 5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _is_info_frame(data: bytes, pos: int, hdr: FrameHeader) -> bool:
+    """
+    True for a Xing/Info or VBRI metadata frame (carries no audio).
+    """
+    xing_at = pos + 4 + hdr.side_info_size
+    return data[xing_at:xing_at + 4] in (b"Xing", b"Info") or data[pos + 36:pos + 40] == b"VBRI"
+
+
+def iter_audio_frames(data: bytes):
+    """
+    Yield (offset, header) for each audio frame in data, skipping ID3v2/ID3v1 tags,
+    Xing/Info/VBRI metadata frames and any bytes that don't sync.
+    """
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    pos = 0
+    while pos < end - 4:
+        tag = _id3v2_size(data, pos)
+        if tag:
+            pos += tag
+            continue
+        hdr = parse_frame_header(data, pos)
+        if hdr is None or pos + hdr.length > end:
+            pos += 1
+            continue
+        if not _is_info_frame(data, pos, hdr):
+            yield pos, hdr
+        pos += hdr.length
+
+
+def _build_xing_frame(first: FrameHeader, frames: int, offsets: array, audio_bytes: int, vbr: bool) -> bytes:
+    """
+    A silent frame matching `first` that carries a Xing/Info header for the stream.
+    """
+    b1, b2 = first.raw[1] | 0x01, first.raw[2] & ~0x02 & 0xFF  # no CRC, no padding
+    xing_at = 4 + first.side_info_size
+    needed = xing_at + 4 + 4 + 4 + 4 + 100
+
+    hdr = None
+    for idx in range(first.bitrate_index, 15):
+        raw = bytes([0xFF, b1, (b2 & 0x0F) | (idx << 4), first.raw[3]])
+        hdr = parse_frame_header(raw, 0)
+        if hdr is not None and hdr.length >= needed:
+            break
+    if hdr is None or hdr.length < needed:
+        raise ValueError("No bitrate leaves room for a Xing header")
+
+    total = hdr.length + audio_bytes
+    toc = bytearray(100)
+    for i in range(100):
+        frame_idx = min(frames - 1, i * frames // 100)
+        toc[i] = min(255, (hdr.length + offsets[frame_idx]) * 256 // total)
+
+    frame = bytearray(hdr.length)
+    frame[0:4] = hdr.raw
+    frame[xing_at:xing_at + 4] = b"Xing" if vbr else b"Info"
+    frame[xing_at + 4:xing_at + 16] = struct.pack(">III", XING_FLAGS, frames, total)
+    frame[xing_at + 16:xing_at + 116] = toc
+    return bytes(frame)
+
+
+def assemble_mp3(
+    parts: list[Path],
+    out,
+    prefix: Callable[[Mp3Info | None], bytes] | None = None,
+) -> Mp3Info | None:
+    """
+    Concatenate MP3 part files into `out` (a binary file object) frame by frame.
+    Per-part ID3 tags and Xing/Info/VBRI frames are dropped and a single Xing
+    header with the real frame count, byte count and seek TOC is written first.
+    If given, prefix(info) is called once the frames are counted and its bytes
+    (e.g. an ID3v2 tag) are written before everything else.
+    Parts are read one at a time (two passes), so memory is bounded by the largest
+    part. Returns None, after a plain byte concatenation, if no frames are found.
+    """
+    first: FrameHeader | None = None
+    offsets = array("Q")
+    audio_bytes = 0
+    bitrates: set[int] = set()
+
+    for part in parts:
+        data = Path(part).read_bytes()
+        for pos, hdr in iter_audio_frames(data):
+            if first is None:
+                first = hdr
+            elif hdr.sample_rate != first.sample_rate or hdr.layer != first.layer:
+                raise ValueError(f"{part}: mixed sample rates/layers cannot be joined")
+            offsets.append(audio_bytes)
+            audio_bytes += hdr.length
+            bitrates.add(hdr.bitrate_index)
+
+    if first is None:
+        if prefix:
+            out.write(prefix(None))
+        for part in parts:
+            out.write(Path(part).read_bytes())
+        return None
+
+    frames = len(offsets)
+    info = Mp3Info(frames, audio_bytes, first.sample_rate, first.samples)
+    if prefix:
+        out.write(prefix(info))
+    out.write(_build_xing_frame(first, frames, offsets, audio_bytes, vbr=len(bitrates) > 1))
+    for part in parts:
+        data = Path(part).read_bytes()
+        for pos, hdr in iter_audio_frames(data):
+            out.write(data[pos:pos + hdr.length])
+
+    return info
+
+
+def mp3_duration(path: str | Path) -> float | None:
+    """
+    Exact duration in seconds from the Xing/Info header written by assemble_mp3.
+    Falls back to counting frame headers (no decoding) for files without one.
+    """
+    data = Path(path).read_bytes()
+    pos = _id3v2_size(data)
+    while pos < len(data) - 4:
+        hdr = parse_frame_header(data, pos)
+        if hdr is not None:
+            break
+        pos += 1
+    else:
+        return None
+
+    xing_at = pos + 4 + hdr.side_info_size
+    if data[xing_at:xing_at + 4] in (b"Xing", b"Info"):
+        flags, = struct.unpack(">I", data[xing_at + 4:xing_at + 8])
+        if flags & 0x01:
+            frames, = struct.unpack(">I", data[xing_at + 8:xing_at + 12])
+            return frames * hdr.samples / hdr.sample_rate
+
+    frames = 0
+    for _, h in iter_audio_frames(data):
+        frames += 1
+    return frames * hdr.samples / hdr.sample_rate if frames else None
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+import threading
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from src.instrument import tracer
+
+# One connection pool and one retry policy for every API call in the process.
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "32"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "16"))
+OPENAI_KEEPALIVE_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+OPENAI_READ_TIMEOUT = float(os.getenv("OPENAI_READ_TIMEOUT", "300"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+
+_client: OpenAI | None = None
+_async_client: AsyncOpenAI | None = None
+_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        keepalive_expiry=OPENAI_KEEPALIVE_SECONDS,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(OPENAI_READ_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+def _count_request(request: httpx.Request) -> None:
+    """
+    Count every HTTP attempt, and the SDK's retries among them, on the caller's
+    open span (see instrument.Tracer.add).
+    """
+    tracer.add("requests")
+    if int(request.headers.get("x-stainless-retry-count") or 0):
+        tracer.add("retries")
+
+
+async def _count_request_async(request: httpx.Request) -> None:
+    _count_request(request)
+
+
+def get_client() -> OpenAI:
+    """
+    Process-wide OpenAI client. Thread-safe; every call reuses its keep-alive pool.
+    The SDK retries 429/5xx/connection errors up to OPENAI_MAX_RETRIES times with
+    backoff; each attempt and retry is counted on the calling span.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            _client = OpenAI(
+                http_client=DefaultHttpxClient(
+                    limits=_limits(), timeout=_timeout(), event_hooks={"request": [_count_request]}
+                ),
+                max_retries=OPENAI_MAX_RETRIES,
+                timeout=_timeout(),
+            )
+        return _client
+
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    Async counterpart of get_client for concurrent asyncio callers (use from one
+    event loop): same connection limits, timeouts and OPENAI_MAX_RETRIES.
+    """
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            _async_client = AsyncOpenAI(
+                http_client=DefaultAsyncHttpxClient(
+                    limits=_limits(), timeout=_timeout(), event_hooks={"request": [_count_request_async]}
+                ),
+                max_retries=OPENAI_MAX_RETRIES,
+                timeout=_timeout(),
+            )
+        return _async_client
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from src.manifest import file_sha256
+
+STATE_PATH = Path("docs/published.json")
+EPISODES_PER_WEEK = 4
+
+
+class PublishState:
+    """
+    What has been generated and published, per week tag, in docs/published.json
+    (committed alongside the feed). Each week keeps its metadata and, per episode
+    code (E01..E04), the published file's sha256, byte size and duration.
+
+    This is the single local source for "is this week out already?". A week is
+    only written here by the RSS step, once its MP3s are in docs/media, so a
+    failed or partial build leaves the file untouched.
+    """
+
+    def __init__(self, path: Path = STATE_PATH):
+        self.path = path
+        if path.exists():
+            self.weeks: dict[str, dict] = json.loads(path.read_text(encoding="utf-8"))["weeks"]
+        else:
+            self.weeks = self._bootstrap()
+
+    def _bootstrap(self) -> dict:
+        """
+        Seed from the feed's item index so weeks published before this file existed count.
+        """
+        from src.rss_store import FeedStore
+
+        weeks: dict[str, dict] = {}
+        feed = self.path.parent / "podcast.xml"
+        if not feed.exists():
+            return weeks
+        for it in FeedStore(feed, "").items:
+            tag, _, fname = it["guid"].partition(":")
+            if not fname.endswith(".mp3"):
+                continue
+            ecode = fname.split("_")[-1].replace(".mp3", "")
+            enc = it.get("enclosure") or {}
+            wk = weeks.setdefault(tag, {"episodes": {}})
+            wk["episodes"][ecode] = {
+                "file": fname,
+                "sha256": None,
+                "bytes": int(enc.get("length", 0)),
+                "duration": it.get("duration"),
+                "published_at": it.get("pubDate"),
+            }
+        return weeks
+
+    def week(self, tag: str) -> Optional[dict]:
+        return self.weeks.get(tag)
+
+    def published_episodes(self, tag: str) -> list[str]:
+        wk = self.weeks.get(tag) or {}
+        return sorted(wk.get("episodes", {}))
+
+    def is_published(self, tag: str, episodes: int = EPISODES_PER_WEEK) -> bool:
+        return len(self.published_episodes(tag)) >= episodes
+
+    def set_week(self, tag: str, week: dict) -> None:
+        """
+        Record a week's metadata (update_rss.week_info fields) as it is published.
+        """
+        wk = self.weeks.setdefault(tag, {"episodes": {}})
+        wk.update({
+            "label": week["label"],
+            "title": week["title"],
+            "scripture_blocks": week.get("scripture_blocks", ""),
+        })
+        if week.get("num"):
+            wk["week"] = int(week["num"])
+
+    def week_info(self, tag: str) -> Optional[dict]:
+        """
+        The recorded metadata as update_rss.week_info fields, or None if the
+        week was published before metadata was kept here (or not at all).
+        """
+        wk = self.weeks.get(tag) or {}
+        if "label" not in wk:
+            return None
+        return {
+            "label": wk["label"],
+            "num": str(wk.get("week", "")),
+            "title": wk.get("title", ""),
+            "scripture_blocks": wk.get("scripture_blocks", ""),
+        }
+
+    def record_episode(self, tag: str, mp3: Path, duration: Optional[str] = None) -> None:
+        ecode = mp3.name.split("_")[-1].replace(".mp3", "")
+        wk = self.weeks.setdefault(tag, {"episodes": {}})
+        wk["episodes"][ecode] = {
+            "file": mp3.name,
+            "sha256": file_sha256(mp3),
+            "bytes": mp3.stat().st_size,
+            "duration": duration,
+            "published_at": datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT"),
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        tmp.write_text(
+            json.dumps({"weeks": self.weeks}, ensure_ascii=False, indent=2, sort_keys=True),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
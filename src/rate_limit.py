@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute` tokens per minute.
+    """
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, amount: float = 1.0) -> None:
+        """
+        Block until `amount` tokens are available, then consume them.
+        Requests larger than the capacity are clamped so they can still proceed.
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(min(wait, 5.0))
+
+
+class _Limits:
+    def __init__(self):
+        self.slots: dict[str, threading.Semaphore] = {}
+        self.requests: dict[str, TokenBucket] = {}
+        self.tokens: dict[str, TokenBucket] = {}
+
+
+_limits = _Limits()
+
+
+def configure(
+    kind: str,
+    concurrency: int | None = None,
+    rpm: float | None = None,
+    tpm: float | None = None,
+) -> None:
+    """
+    Set limits for one kind of call ("fetch", "responses", "speech").
+    Kinds that are never configured are not throttled, so a normal weekly run
+    behaves exactly as before.
+    """
+    if concurrency:
+        _limits.slots[kind] = threading.BoundedSemaphore(concurrency)
+    if rpm:
+        _limits.requests[kind] = TokenBucket(rpm)
+    if tpm:
+        _limits.tokens[kind] = TokenBucket(tpm)
+
+
+@contextmanager
+def throttle(kind: str, tokens: int = 0):
+    """
+    Hold a concurrency slot for `kind` and draw from its request/token buckets.
+    """
+    slot = _limits.slots.get(kind)
+    if slot:
+        slot.acquire()
+    try:
+        if kind in _limits.requests:
+            _limits.requests[kind].take(1)
+        if tokens and kind in _limits.tokens:
+            _limits.tokens[kind].take(tokens)
+        yield
+    finally:
+        if slot:
+            slot.release()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for rate limiting (~4 characters per token for English).
+    """
+    return len(text) // 4 + 1
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+ITUNES_NS = "http://www.itunes.com/dtds/podcast-1.0.dtd"
+ATOM_NS = "http://www.w3.org/2005/Atom"
+FH_NS = "http://purl.org/syndication/history/1.0"  # RFC 5005 feed history
+ET.register_namespace("itunes", ITUNES_NS)
+ET.register_namespace("atom", ATOM_NS)
+ET.register_namespace("fh", FH_NS)
+
+FEED_MAX_ITEMS = int(os.getenv("FEED_MAX_ITEMS", "20"))
+ARCHIVE_PAGE_SIZE = int(os.getenv("FEED_ARCHIVE_PAGE_SIZE", "40"))
+ARCHIVE_DIR = "archive"
+
+
+def _item_to_dict(item: ET.Element) -> dict:
+    guid_el = item.find("guid")
+    enc = item.find("enclosure")
+    return {
+        "guid": (guid_el.text or "").strip() if guid_el is not None else "",
+        "title": item.findtext("title", ""),
+        "description": item.findtext("description", ""),
+        "link": item.findtext("link", ""),
+        "pubDate": item.findtext("pubDate", ""),
+        "enclosure": dict(enc.attrib) if enc is not None else None,
+        "duration": item.findtext(f"{{{ITUNES_NS}}}duration"),
+    }
+
+
+def _dict_to_item(d: dict) -> ET.Element:
+    item = ET.Element("item")
+    ET.SubElement(item, "title").text = d["title"]
+    ET.SubElement(item, "description").text = d["description"]
+    ET.SubElement(item, "link").text = d["link"]
+    guid_el = ET.SubElement(item, "guid")
+    guid_el.text = d["guid"]
+    guid_el.set("isPermaLink", "false")
+    ET.SubElement(item, "pubDate").text = d["pubDate"]
+    if d.get("enclosure"):
+        enc = ET.SubElement(item, "enclosure")
+        for k in ("url", "length", "type"):
+            if k in d["enclosure"]:
+                enc.set(k, d["enclosure"][k])
+    if d.get("duration"):
+        ET.SubElement(item, f"{{{ITUNES_NS}}}duration").text = d["duration"]
+    return item
+
+
+class FeedStore:
+    """
+    The podcast feed's items kept in a JSON sidecar (newest first) next to the XML.
+
+    Adding items only touches the sidecar; write() renders the subscription feed
+    with the newest FEED_MAX_ITEMS items and moves older ones to RFC 5005 archive
+    pages (docs/archive/podcast-N.xml, oldest first). Full archive pages never
+    change, so only the newest page (and its neighbour's next-archive link when
+    a page is added) is rewritten.
+    """
+
+    def __init__(self, feed_path: Path, feed_url: str, template: Path | None = None, title: str = ""):
+        self.feed_path = feed_path
+        self.feed_url = feed_url
+        self.sidecar = feed_path.with_name(feed_path.stem + "_items.json")
+        if self.sidecar.exists():
+            data = json.loads(self.sidecar.read_text(encoding="utf-8"))
+        elif not feed_path.exists() and template is not None:
+            # A new feed: channel metadata from the template feed, no items.
+            data = self._bootstrap(template, title)
+            data["items"] = []
+        else:
+            data = self._bootstrap()
+        self.channel_xml: list[str] = data["channel_xml"]
+        self.items: list[dict] = data["items"]
+        self.pages: dict[str, str] = data.get("pages", {})
+        self.guids = {it["guid"] for it in self.items}
+
+    def _bootstrap(self, source: Path | None = None, title: str = "") -> dict:
+        """
+        One-time import of an existing feed: channel metadata plus its items.
+        """
+        channel = ET.parse(source or self.feed_path).getroot().find("channel")
+        if channel is None:
+            raise SystemExit("Invalid RSS: missing <channel>")
+        header, items = [], []
+        for child in channel:
+            if child.tag in ("title", f"{{{ITUNES_NS}}}title") and title:
+                child.text = title
+            if child.tag == "item":
+                items.append(_item_to_dict(child))
+            elif child.tag != f"{{{ATOM_NS}}}link":
+                header.append(ET.tostring(child, encoding="unicode").strip())
+        return {"channel_xml": header, "items": items, "pages": {}}
+
+    def has(self, guid: str) -> bool:
+        return guid in self.guids
+
+    def add(self, item: dict) -> bool:
+        """
+        Add an item as the newest entry. Returns False if its GUID is already present.
+        """
+        if item["guid"] in self.guids:
+            return False
+        self.items.insert(0, item)
+        self.guids.add(item["guid"])
+        return True
+
+    def _page_url(self, n: int) -> str:
+        base = self.feed_url.rsplit("/", 1)[0]
+        return f"{base}/{ARCHIVE_DIR}/{self.feed_path.stem}-{n}.xml"
+
+    def _page_path(self, n: int) -> Path:
+        return self.feed_path.parent / ARCHIVE_DIR / f"{self.feed_path.stem}-{n}.xml"
+
+    def _render(self, items: list[dict], links: dict[str, str], archive: bool) -> ET.ElementTree:
+        rss = ET.Element("rss", {"version": "2.0"})
+        channel = ET.SubElement(rss, "channel")
+        for fragment in self.channel_xml:
+            channel.append(ET.fromstring(fragment))
+        for rel, href in links.items():
+            ET.SubElement(channel, f"{{{ATOM_NS}}}link", {"rel": rel, "href": href})
+        if archive:
+            ET.SubElement(channel, f"{{{FH_NS}}}archive")
+        for it in items:
+            channel.append(_dict_to_item(it))
+        tree = ET.ElementTree(rss)
+        ET.indent(tree, space="  ")
+        return tree
+
+    def write(self) -> None:
+        current = self.items[:FEED_MAX_ITEMS]
+        archived = list(reversed(self.items[FEED_MAX_ITEMS:]))  # oldest first
+        pages = [archived[i:i + ARCHIVE_PAGE_SIZE] for i in range(0, len(archived), ARCHIVE_PAGE_SIZE)]
+
+        links = {"self": self.feed_url}
+        if pages:
+            links["prev-archive"] = self._page_url(len(pages))
+        self._render(current, links, archive=False).write(self.feed_path, encoding="utf-8", xml_declaration=True)
+
+        for n, page in enumerate(pages, start=1):
+            page_links = {"self": self._page_url(n), "current": self.feed_url}
+            if n > 1:
+                page_links["prev-archive"] = self._page_url(n - 1)
+            if n < len(pages):
+                page_links["next-archive"] = self._page_url(n + 1)
+            # Newest first within a page, like the main feed.
+            page_items = list(reversed(page))
+            sig = hashlib.sha256(
+                json.dumps([page_items, page_links, self.channel_xml], sort_keys=True).encode("utf-8")
+            ).hexdigest()
+            path = self._page_path(n)
+            if self.pages.get(str(n)) == sig and path.exists():
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._render(page_items, page_links, archive=True).write(path, encoding="utf-8", xml_declaration=True)
+            self.pages[str(n)] = sig
+            print(f"RSS: wrote archive page {path}")
+
+        tmp = self.sidecar.with_name(self.sidecar.name + ".tmp")
+        tmp.write_text(
+            json.dumps({"channel_xml": self.channel_xml, "items": self.items, "pages": self.pages},
+                       ensure_ascii=False, indent=1),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.sidecar)
@@ -1,45 +1,51 @@
-import json
 import os
 import sys
+import threading
+import time
 from pathlib import Path
 from typing import List, Optional
 from datetime import datetime, timedelta, date
-import urllib.request
-import urllib.error
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Ensure repo root is importable (critical for GitHub Actions)
 REPO_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(REPO_ROOT))
 
-from src.cfm_fetch import fetch_cfm_week_text
-from src.script_writer import (
-    load_master_prompt,
-    build_prompt,
-    generate_scripts,
-    expand_to_word_range,
-    shorten_to_word_range,
-    word_count,
-)
-from src.tts import tts_to_mp3
+from src.compact import CFM_TOKEN_BUDGET, compact_source
+from src.disk_cache import cache_key
+from src.manifest import MANIFEST_NAME, StageManifest
+from src.week_index import load_week_index
+from src.publish_state import PublishState
+from src.feed_profiles import FeedProfile, load_profiles
+from src.instrument import span, tracer
+
+# The OpenAI SDK, bs4/lxml and mutagen are imported inside the stages that use
+# them, so runs that stop early (week already published) never load them.
+
+# Enforce ~10 minutes (word-based)
+MIN_WORDS = 1300
+MAX_WORDS = 1600
+
+EPISODE_WORKERS = int(os.getenv("EPISODE_WORKERS", "4"))
+SCRIPT_MODEL = "gpt-4o-mini"
+# "stream": start resize/TTS for each episode as soon as the model finishes it.
+# "single": wait for the whole 4-episode response, then split it.
+# "episodes": four concurrent per-episode requests, each retried on its own.
+SCRIPT_MODE = os.getenv("SCRIPT_MODE", "stream").lower()
+# "diff": paragraph edits applied locally (fit_to_word_range).
+# "rewrite": full-script expand/shorten calls.
+RESIZE_MODE = os.getenv("RESIZE_MODE", "diff").lower()
+TRACE_CHROME = os.getenv("TRACE_CHROME", "false").lower() == "true"
 
 
 # -----------------------------
 # Helpers
 # -----------------------------
-def load_index(path: str = "cfm_index/cfm_2026_index.json") -> list[dict]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
 def split_episodes(all_text: str) -> List[str]:
-    headers = [
-        "=== EPISODE 1: BIG PICTURE & CONTEXT ===",
-        "=== EPISODE 2: SCRIPTURE WALKTHROUGH ===",
-        "=== EPISODE 3: DOCTRINES & PRINCIPLES ===",
-        "=== EPISODE 4: MODERN LIFE APPLICATION ===",
-    ]
+    from src.script_writer import EPISODE_HEADERS
+
     positions = []
-    for h in headers:
+    for h in EPISODE_HEADERS:
         idx = all_text.find(h)
         if idx != -1:
             positions.append(idx)
@@ -67,117 +73,294 @@ def next_monday_local(tz_name: str = "America/Chicago") -> date:
     return today + timedelta(days=days_ahead)
 
 
-def find_week_by_start_date(index: list[dict], start_date_iso: str) -> Optional[dict]:
-    for wk in index:
-        if wk.get("start_date") == start_date_iso:
-            return wk
-    return None
+def process_episode(
+    i: int,
+    ep_text: str,
+    week: dict,
+    dist: Path,
+    profiles: List[FeedProfile],
+    log: List[str],
+    manifest: StageManifest,
+    cancelled: Optional[threading.Event] = None,
+) -> None:
+    """
+    Resize one episode script to the word range, save it, and synthesize its MP3
+    once per feed profile (concurrently when there are several).
+    Progress lines are appended to `log` so parallel runs can print them in order.
+    Each step is skipped when the manifest has a fresh result for the same inputs.
+    The MP3s are written with their ID3 tag already in place.
+    If `cancelled` is set by the time the script is saved, TTS is skipped.
+    """
+    from src.script_writer import word_count
 
+    week_num = int(week["week"])
+    script_name = f"W{week_num:02d}_E{i:02d}.txt"
+    script_key = cache_key(ep_text, str(MIN_WORDS), str(MAX_WORDS))
+    done = manifest.fresh(f"episode_{i}", script_key)
+    if done:
+        ep_text = done.read_text(encoding="utf-8")
+        log.append(f"Episode {i}: reusing {dist / script_name} ({word_count(ep_text)} words)")
+    else:
+        with span("stage.resize", week=week_num, episode=i):
+            ep_text = resize_episode(i, ep_text, log)
 
-def head_ok(url: str, timeout: int = 20) -> bool:
+        # Save script per-episode locally
+        (dist / script_name).write_text(ep_text, encoding="utf-8")
+        manifest.record(f"episode_{i}", script_key, dist / script_name)
+        log.append(f"Saved {dist / script_name}")
+
+    if cancelled is not None and cancelled.is_set():
+        log.append(f"Episode {i}: cancelled before TTS")
+        return
+
+    # Generate MP3s (exclude SHOW NOTES)
+    audio_text = strip_show_notes_for_audio(ep_text)
+    if len(profiles) == 1:
+        synthesize_episode(i, audio_text, week, dist, profiles[0], log, manifest)
+        return
+
+    logs: List[List[str]] = [[] for _ in profiles]
+    with ThreadPoolExecutor(max_workers=len(profiles)) as pool:
+        futures = [
+            pool.submit(synthesize_episode, i, audio_text, week, dist, profile, plog, manifest)
+            for profile, plog in zip(profiles, logs)
+        ]
+    for plog in logs:
+        log.extend(plog)
+    for fut in futures:
+        fut.result()
+
+
+def synthesize_episode(
+    i: int,
+    audio_text: str,
+    week: dict,
+    dist: Path,
+    profile: FeedProfile,
+    log: List[str],
+    manifest: StageManifest,
+) -> None:
     """
-    Returns True if HEAD returns 2xx/3xx. False on errors/404.
+    Synthesize one episode's MP3 for one feed profile into its dist directory.
     """
-    try:
-        req = urllib.request.Request(url, method="HEAD")
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return 200 <= resp.status < 400
-    except Exception:
-        return False
+    from src.tag_mp3s import render_id3_header
+    from src.tts import tts_to_file
 
+    week_num = int(week["week"])
+    out_dir = profile.dist_dir(dist)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    mp3_path = out_dir / f"W{week_num:02d}_E{i:02d}.mp3"
+    mp3_key = cache_key(audio_text, profile.voice, profile.model)
+    if manifest.fresh(profile.stage(i), mp3_key):
+        log.append(f"Episode {i}: reusing {mp3_path}")
+        return
+
+    def id3_header(info) -> bytes:
+        return render_id3_header(
+            week_num=str(week_num),
+            week_label=f"{week['start_date']} to {week['end_date']}",
+            week_title=week["title"],
+            ecode=f"E{i:02d}",
+            duration=info.duration if info else None,
+        )
+
+    with span("stage.tts", week=week_num, episode=i, feed=profile.name):
+        size = tts_to_file(audio_text, mp3_path, voice=profile.voice, model=profile.model, id3_header=id3_header)
+    manifest.record(profile.stage(i), mp3_key, mp3_path)
+    log.append(f"Saved {mp3_path} ({size} bytes)")
 
-def github_pages_base() -> str:
+
+def resize_episode(i: int, ep_text: str, log: List[str]) -> str:
     """
-    Uses GITHUB_REPOSITORY=owner/repo to build:
-      https://owner.github.io/repo
+    Fit an episode script into MIN_WORDS..MAX_WORDS: by paragraph edits
+    (RESIZE_MODE=diff), or by expanding (up to twice) or shortening the whole script.
     """
-    repo = os.getenv("GITHUB_REPOSITORY", "").strip()
-    if not repo or "/" not in repo:
-        # Fallback: allow manual override if ever needed
-        override = os.getenv("PAGES_BASE_URL", "").strip()
-        if override:
-            return override.rstrip("/")
-        raise SystemExit("Missing GITHUB_REPOSITORY and no PAGES_BASE_URL override provided.")
-    owner, name = repo.split("/", 1)
-    return f"https://{owner}.github.io/{name}"
+    from src.script_writer import expand_to_word_range, fit_to_word_range, shorten_to_word_range, word_count
 
+    wc = word_count(ep_text)
+    log.append(f"Episode {i} initial words: {wc}")
 
-# -----------------------------
-# Main
-# -----------------------------
-def main() -> None:
-    print("RUN_WEEKLY: script started")
+    if RESIZE_MODE == "diff":
+        if MIN_WORDS <= wc <= MAX_WORDS:
+            return ep_text
+        ep_text = fit_to_word_range(
+            ep_text, MIN_WORDS, MAX_WORDS, log=lambda msg: log.append(f"Episode {i} {msg}")
+        )
+        log.append(f"Episode {i} fitted words: {word_count(ep_text)}")
+        return ep_text
 
-    # Required env
-    if not os.getenv("OPENAI_API_KEY"):
-        raise SystemExit("Missing OPENAI_API_KEY")
+    if wc < MIN_WORDS:
+        ep_text = expand_to_word_range(ep_text, MIN_WORDS, MAX_WORDS)
+        wc = word_count(ep_text)
+        log.append(f"Episode {i} expanded words: {wc}")
+        if wc < MIN_WORDS:
+            ep_text = expand_to_word_range(ep_text, MIN_WORDS, MAX_WORDS)
+            wc = word_count(ep_text)
+            log.append(f"Episode {i} expanded again: {wc}")
 
-    force = os.getenv("FORCE_REGENERATE", "false").lower() == "true"
-    print(f"FORCE_REGENERATE={force}")
+    if wc > MAX_WORDS:
+        ep_text = shorten_to_word_range(ep_text, MIN_WORDS, MAX_WORDS)
+        wc = word_count(ep_text)
+        log.append(f"Episode {i} shortened words: {wc}")
 
-    # Load full-year index
-    index = load_index()
-    if not index:
-        raise SystemExit("Index is empty: cfm_index/cfm_2026_index.json")
+    return ep_text
 
-    # Select upcoming week based on next Monday (America/Chicago)
-    start_dt = next_monday_local("America/Chicago")
-    start_iso = start_dt.isoformat()
-    week = find_week_by_start_date(index, start_iso)
 
-    if not week:
-        raise SystemExit(
-            f"No week found in cfm_2026_index.json with start_date={start_iso}.\n"
-            "Update the index file and rerun."
-        )
+class EpisodeRunner:
+    """
+    Runs process_episode on a thread pool (EPISODE_WORKERS by default) for each
+    episode as it is submitted, so work can start before all scripts exist.
+    A failure in one episode does not stop the others; cancel() stops all of
+    them before TTS. Leaving the `with` block waits for every episode, prints the
+    logs in episode order and, unless an exception is already propagating,
+    raises SystemExit if any episode failed.
+    """
+
+    def __init__(
+        self,
+        week: dict,
+        dist: Path,
+        profiles: List[FeedProfile],
+        manifest: StageManifest,
+        max_workers: Optional[int] = None,
+    ):
+        self.week = week
+        self.dist = dist
+        self.profiles = profiles
+        self.manifest = manifest
+        self.pool = ThreadPoolExecutor(max_workers=max(1, max_workers or EPISODE_WORKERS))
+        self.logs: dict[int, List[str]] = {}
+        self.futures: dict[int, Future] = {}
+        self.errors: dict[int, str] = {}
+        self.cancelled = threading.Event()
+
+    def submit(self, i: int, ep_text: str) -> None:
+        log = self.logs[i] = []
+        self.futures[i] = self.pool.submit(self._run, i, ep_text, log)
+
+    def fail(self, i: int, err: str) -> None:
+        """
+        Report an episode that failed before it could be submitted (e.g. generation).
+        """
+        self.logs[i] = []
+        self.errors[i] = err
+
+    def cancel(self) -> None:
+        """
+        Drop episodes that have not started and skip TTS for the ones in progress.
+        """
+        self.cancelled.set()
+        for future in self.futures.values():
+            future.cancel()
+
+    def _run(self, i: int, ep_text: str, log: List[str]) -> Optional[str]:
+        try:
+            process_episode(
+                i, ep_text, self.week, self.dist, self.profiles, log, self.manifest, self.cancelled
+            )
+            return None
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+    def __enter__(self) -> "EpisodeRunner":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.pool.shutdown(wait=True)
+        failed = []
+        for i in sorted(self.logs):
+            for line in self.logs[i]:
+                print(line)
+            if i in self.futures and self.futures[i].cancelled():
+                print(f"Episode {i}: cancelled")
+                continue
+            err = self.futures[i].result() if i in self.futures else self.errors[i]
+            if err:
+                print(f"Episode {i} FAILED: {err}")
+                failed.append(i)
+
+        if failed and exc_type is None:
+            raise SystemExit(f"Episode(s) failed: {', '.join(str(i) for i in failed)}")
+
+
+def process_episodes(
+    episodes: List[str],
+    week: dict,
+    dist: Path,
+    profiles: List[FeedProfile],
+    manifest: StageManifest,
+    max_workers: Optional[int] = None,
+) -> None:
+    """
+    Run process_episode for every episode on a thread pool (see EpisodeRunner).
+    """
+    workers = max(1, min(max_workers or EPISODE_WORKERS, len(episodes)))
+    with EpisodeRunner(week, dist, profiles, manifest, workers) as runner:
+        for i, ep_text in enumerate(episodes, start=1):
+            runner.submit(i, ep_text)
+
+
+def week_tag(week: dict) -> str:
+    return f"week-{week['start_date']}"
+
+
+def build_week(
+    week: dict,
+    dist: Path,
+    resume: bool = True,
+    profiles: Optional[List[FeedProfile]] = None,
+) -> None:
+    """
+    Fetch, script, resize and synthesize one week into dist/, checkpointing each
+    stage in dist/manifest.json so an interrupted build resumes where it stopped.
+    Scripts are generated once and synthesized for every feed profile (feeds.json).
+    """
+    from src.cfm_fetch import cached_link_texts, fetch_cfm_week_text
+    from src.script_writer import build_prompt, generate_scripts, load_master_prompt
 
+    dist.mkdir(parents=True, exist_ok=True)
+    profiles = profiles or load_profiles()
     week_num = int(week["week"])
     week_title = week["title"]
     week_dates = f'{week["start_date"]} to {week["end_date"]}'
     scripture_blocks = week.get("scripture_blocks", "")
     url = week["url"]
-
-    print(f"Selected week: {week_num} | {week_dates} | {week_title}")
-    print(f"Fetching: {url}")
-
-    # Prepare dist/ and write metadata for workflow
-    dist = Path("dist")
-    dist.mkdir(parents=True, exist_ok=True)
-
-    tag = f"week-{week['start_date']}"
-    week_label = f"{week['start_date']} to {week['end_date']}"
-
-    def esc(v: str) -> str:
-        return str(v).replace("\n", " ").replace("\r", " ").strip()
-
-    (dist / "week_meta.env").write_text(
-        "PODCAST_TAG={}\n"
-        "PODCAST_WEEK_LABEL={}\n"
-        "PODCAST_WEEK_NUM={}\n"
-        "PODCAST_WEEK_TITLE={}\n"
-        "PODCAST_SCRIPTURE_BLOCKS={}\n".format(
-            esc(tag),
-            esc(week_label),
-            week_num,
-            esc(week_title),
-            esc(scripture_blocks),
-        ),
-        encoding="utf-8",
-    )
-    print(f"Wrote week metadata: {tag} | {week_label}")
-
-    # Skip if already published on GitHub Pages (unless force)
-    pages_base = github_pages_base()
-    already_url = f"{pages_base}/media/{tag}/W{week_num:02d}_E01.mp3"
-    if head_ok(already_url) and not force:
-        print(f"Already published on Pages (found {already_url}). Exiting.")
-        return
-    if head_ok(already_url) and force:
-        print("Already published on Pages, but FORCE_REGENERATE=true — continuing anyway.")
+    manifest = StageManifest(dist, week_tag(week), enabled=resume)
 
     # Fetch CFM content
-    cfm_text = fetch_cfm_week_text(url)
-    print(f"Fetched CFM text length: {len(cfm_text)} chars")
+    fetched = manifest.fresh("fetch", url)
+    if fetched:
+        cfm_text = fetched.read_text(encoding="utf-8")
+        print(f"Reusing fetched CFM text ({len(cfm_text)} chars)")
+    else:
+        print(f"Fetching: {url}")
+        with span("stage.fetch", week=week_num):
+            cfm_text = fetch_cfm_week_text(url)
+        (dist / "cfm_text.txt").write_text(cfm_text, encoding="utf-8")
+        manifest.record("fetch", url, dist / "cfm_text.txt")
+        print(f"Fetched CFM text length: {len(cfm_text)} chars")
+
+    # Drop boilerplate/duplicates and trim to CFM_TOKEN_BUDGET before prompting.
+    # Checkpointed, so a resumed build gets the same prompt even when the page
+    # (and its link texts) is no longer in the page cache.
+    compact_key = cache_key(cfm_text, str(CFM_TOKEN_BUDGET))
+    compacted = manifest.fresh("compact", compact_key)
+    if compacted:
+        cfm_text = compacted.read_text(encoding="utf-8")
+        print(f"Reusing compacted CFM text ({len(cfm_text)} chars)")
+    else:
+        with span("stage.compact", week=week_num) as sp:
+            cfm_text, stats = compact_source(cfm_text, link_texts=cached_link_texts(url))
+            for k, v in stats.items():
+                sp.add(k, v)
+        (dist / "cfm_compact.txt").write_text(cfm_text, encoding="utf-8")
+        manifest.record("compact", compact_key, dist / "cfm_compact.txt")
+        print(
+            "Compacted CFM text: {chars_before} -> {chars_after} chars, "
+            "{tokens_before} -> {tokens_after} tokens "
+            "(dropped {dropped_boilerplate} boilerplate, {dropped_duplicates} duplicate, "
+            "{dropped_budget} over budget)".format(**stats)
+        )
 
     # Generate scripts
     master = load_master_prompt()
@@ -189,13 +372,24 @@ def main() -> None:
         cfm_text=cfm_text,
     )
 
-    print("Generating scripts (4 episodes)...")
-    scripts_text = generate_scripts(prompt=prompt, model="gpt-4o-mini")
-    print(f"Generated scripts length: {len(scripts_text)} chars")
+    if SCRIPT_MODE == "episodes":
+        generate_per_episode(prompt, week, dist, profiles, manifest)
+        return
 
-    # Save combined script locally so you have it even without Drive
-    (dist / "all_episodes.txt").write_text(scripts_text, encoding="utf-8")
-    print("Saved dist/all_episodes.txt")
+    scripts_key = cache_key(SCRIPT_MODEL, prompt)
+    generated = manifest.fresh("scripts", scripts_key)
+    if generated:
+        scripts_text = generated.read_text(encoding="utf-8")
+        print(f"Reusing {dist / 'all_episodes.txt'} ({len(scripts_text)} chars)")
+    elif SCRIPT_MODE == "stream":
+        generate_streamed(prompt, week, dist, profiles, manifest, scripts_key)
+        return
+    else:
+        print("Generating scripts (4 episodes)...")
+        with span("stage.scripts", week=week_num):
+            scripts_text = generate_scripts(prompt=prompt, model=SCRIPT_MODEL)
+        print(f"Generated scripts length: {len(scripts_text)} chars")
+        save_scripts(dist, scripts_text, manifest, scripts_key)
 
     # Split episodes
     episodes = split_episodes(scripts_text)
@@ -203,43 +397,205 @@ def main() -> None:
     if len(episodes) != 4:
         raise SystemExit("Could not split into 4 episodes. Check episode headers in all_episodes.txt.")
 
-    # Enforce ~10 minutes (word-based)
-    MIN_WORDS = 1300
-    MAX_WORDS = 1600
-    voice = "alloy"
-    tts_model = "tts-1"
+    process_episodes(episodes, week, dist, profiles=profiles, manifest=manifest)
 
-    for i, ep_text in enumerate(episodes, start=1):
-        wc = word_count(ep_text)
-        print(f"Episode {i} initial words: {wc}")
 
-        if wc < MIN_WORDS:
-            ep_text = expand_to_word_range(ep_text, MIN_WORDS, MAX_WORDS)
-            wc = word_count(ep_text)
-            print(f"Episode {i} expanded words: {wc}")
-            if wc < MIN_WORDS:
-                ep_text = expand_to_word_range(ep_text, MIN_WORDS, MAX_WORDS)
-                wc = word_count(ep_text)
-                print(f"Episode {i} expanded again: {wc}")
-
-        if wc > MAX_WORDS:
-            ep_text = shorten_to_word_range(ep_text, MIN_WORDS, MAX_WORDS)
-            wc = word_count(ep_text)
-            print(f"Episode {i} shortened words: {wc}")
+def save_scripts(dist: Path, scripts_text: str, manifest: StageManifest, scripts_key: str) -> None:
+    # Save combined script locally so you have it even without Drive
+    (dist / "all_episodes.txt").write_text(scripts_text, encoding="utf-8")
+    manifest.record("scripts", scripts_key, dist / "all_episodes.txt")
+    print(f"Saved {dist / 'all_episodes.txt'}")
+
+
+def generate_streamed(
+    prompt: str,
+    week: dict,
+    dist: Path,
+    profiles: List[FeedProfile],
+    manifest: StageManifest,
+    scripts_key: str,
+) -> None:
+    """
+    Stream the 4-episode generation and hand each episode to the EpisodeRunner
+    as soon as its text is complete, so resize/TTS of episode 1 overlaps the
+    model writing episodes 2-4. If generation fails (including missing or
+    out-of-order episode headers), the episodes already handed off are
+    cancelled before TTS.
+    """
+    from src.script_writer import EpisodeSplitError, generate_scripts_streaming
 
-        # Save script per-episode locally
-        script_name = f"W{week_num:02d}_E{i:02d}.txt"
-        (dist / script_name).write_text(ep_text, encoding="utf-8")
-        print(f"Saved dist/{script_name}")
+    week_num = int(week["week"])
+    print("Generating scripts (4 episodes, streamed)...")
+    with EpisodeRunner(week, dist, profiles, manifest) as runner:
+        t0 = time.perf_counter()
+
+        def on_episode(i: int, ep_text: str) -> None:
+            elapsed = time.perf_counter() - t0
+            print(f"Episode {i} script complete after {elapsed:.1f}s; starting resize/TTS")
+            runner.submit(i, ep_text)
+
+        try:
+            with span("stage.scripts", week=week_num, stream=True):
+                scripts_text = generate_scripts_streaming(prompt, on_episode, model=SCRIPT_MODEL)
+        except EpisodeSplitError as e:
+            runner.cancel()
+            (dist / "all_episodes.txt").write_text(e.text, encoding="utf-8")
+            raise SystemExit(f"{e} Check episode headers in {dist / 'all_episodes.txt'}.")
+        except BaseException:
+            # API error or dropped stream: the scripts won't be checkpointed, so
+            # audio for the episodes handed off so far would be thrown away.
+            runner.cancel()
+            raise
+        print(f"Generated scripts length: {len(scripts_text)} chars")
+        save_scripts(dist, scripts_text, manifest, scripts_key)
+
+
+def generate_per_episode(
+    prompt: str,
+    week: dict,
+    dist: Path,
+    profiles: List[FeedProfile],
+    manifest: StageManifest,
+) -> None:
+    """
+    Generate the four episodes as separate concurrent requests (each retried on
+    its own) and start resize/TTS for each as soon as its script is back. Raw
+    scripts are checkpointed as dist/raw_E0n.txt and joined into all_episodes.txt.
+    """
+    from src.script_writer import EPISODE_HEADERS, build_episode_prompt, generate_episode, word_count
 
-        # Generate MP3 (exclude SHOW NOTES)
-        audio_text = strip_show_notes_for_audio(ep_text)
-        mp3 = tts_to_mp3(audio_text, voice=voice, model=tts_model)
+    week_num = int(week["week"])
+    scripts: dict[int, str] = {}
+    print("Generating scripts (4 episodes, one request each)...")
+
+    with EpisodeRunner(week, dist, profiles, manifest) as runner:
+
+        def generate_one(i: int) -> None:
+            raw = dist / f"raw_E{i:02d}.txt"
+            key = cache_key(SCRIPT_MODEL, build_episode_prompt(prompt, i, MIN_WORDS, MAX_WORDS))
+            done = manifest.fresh(f"script_{i}", key)
+            if done:
+                ep_text = done.read_text(encoding="utf-8")
+                print(f"Episode {i}: reusing {raw}")
+            else:
+                try:
+                    with span("stage.scripts", week=week_num, episode=i):
+                        ep_text = generate_episode(prompt, i, MIN_WORDS, MAX_WORDS, model=SCRIPT_MODEL)
+                except Exception as e:
+                    runner.fail(i, f"{type(e).__name__}: {e}")
+                    return
+                raw.write_text(ep_text, encoding="utf-8")
+                manifest.record(f"script_{i}", key, raw)
+                print(f"Episode {i} script complete ({word_count(ep_text)} words); starting resize/TTS")
+            scripts[i] = ep_text
+            runner.submit(i, ep_text)
+
+        with ThreadPoolExecutor(max_workers=len(EPISODE_HEADERS)) as pool:
+            list(pool.map(generate_one, range(1, len(EPISODE_HEADERS) + 1)))
+
+        if len(scripts) == len(EPISODE_HEADERS):
+            (dist / "all_episodes.txt").write_text(
+                "\n\n".join(scripts[i] for i in sorted(scripts)), encoding="utf-8"
+            )
+            print(f"Saved {dist / 'all_episodes.txt'}")
 
-        mp3_filename = f"W{week_num:02d}_E{i:02d}.mp3"
-        (dist / mp3_filename).write_bytes(mp3)
-        print(f"Saved dist/{mp3_filename}")
 
+# -----------------------------
+# Main
+# -----------------------------
+def select_week(index, week_date: str = "") -> dict:
+    """
+    The indexed week containing week_date (YYYY-MM-DD), or next Monday (America/Chicago).
+    """
+    start_dt = date.fromisoformat(week_date) if week_date else next_monday_local("America/Chicago")
+    week = index.week_for_date(start_dt)
+    if not week:
+        raise SystemExit(
+            f"No week found in cfm_index/ containing {start_dt.isoformat()}.\n"
+            "Update the index file and rerun."
+        )
+    return week
+
+
+def write_trace(dist: Path = Path("dist")) -> None:
+    """
+    Write dist/trace.json (+ dist/trace.chrome.json with TRACE_CHROME=true) and
+    print the summary, if anything was traced.
+    """
+    if not tracer.spans:
+        return
+    tracer.write(dist, chrome=TRACE_CHROME)
+    print(f"Trace summary ({dist / 'trace.json'}):\n" + tracer.summary())
+
+
+def generate(
+    force: bool = False,
+    resume: bool = True,
+    week_date: str = "",
+    dist: Path = Path("dist"),
+) -> Optional[dict]:
+    """
+    Select the week, skip it if docs/published.json already has it (unless force),
+    otherwise build it into dist/. Returns the week record that was built, or
+    None when the run was skipped. The caller writes the trace (write_trace)
+    once its own stages are done.
+    """
+    # Load the compiled index (all manual years)
+    index = load_week_index()
+    if not len(index):
+        raise SystemExit("Index is empty: cfm_index/")
+
+    week = select_week(index, week_date)
+    print(f"Selected week: {week['week']} | {week['start_date']} to {week['end_date']} | {week['title']}")
+
+    dist.mkdir(parents=True, exist_ok=True)
+    tag = week_tag(week)
+
+    # Skip if already published (docs/published.json) unless force
+    state = PublishState()
+    published = state.published_episodes(tag)
+    if state.is_published(tag) and not force:
+        print(f"Already published ({', '.join(published)} in {state.path}). Exiting.")
+        return None
+    if published and force:
+        print(f"Already published ({', '.join(published)}), but FORCE_REGENERATE=true — continuing anyway.")
+    elif published:
+        print(f"Partly published ({', '.join(published)}) — regenerating the week.")
+
+    # Build in .cache/prepared/<tag>/, which CI keeps even when a run fails, and
+    # resume from its stage manifest: a week prepared ahead (src/lookahead.py) or
+    # left half-built by a failed run only runs the missing stages. RESUME=false
+    # or FORCE_REGENERATE=true rebuilds every stage.
+    from src.lookahead import PREPARED_DIR, take_prepared
+
+    work = PREPARED_DIR / tag
+    reuse = resume and not force
+    if reuse and (work / MANIFEST_NAME).exists():
+        print(f"Resuming from {work / MANIFEST_NAME}")
+    build_week(week, work, resume=reuse)
+    take_prepared(tag, dist)
+    print(f"Copied {work} into {dist}/")
+    return week
+
+
+def main() -> None:
+    print("RUN_WEEKLY: script started")
+
+    # Required env
+    if not os.getenv("OPENAI_API_KEY"):
+        raise SystemExit("Missing OPENAI_API_KEY")
+
+    force = os.getenv("FORCE_REGENERATE", "false").lower() == "true"
+    print(f"FORCE_REGENERATE={force}")
+
+    try:
+        generate(
+            force=force,
+            resume=os.getenv("RESUME", "true").lower() == "true",
+            week_date=os.getenv("WEEK_DATE", "").strip(),
+        )
+    finally:
+        write_trace()
     print("RUN_WEEKLY: done")
 
 
@@ -1,6 +1,154 @@
+from __future__ import annotations
+
+import json
+import os
 import pathlib
+import re
+import threading
+import time
+from typing import Callable
+
 from openai import OpenAI
-from openai import RateLimitError, APIStatusError
+from openai import APIError, RateLimitError, APIStatusError
+
+from src.disk_cache import DiskCache, cache_key
+from src.rate_limit import estimate_tokens, throttle
+from src.instrument import span
+from src.openai_client import get_client
+
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".cache/llm")
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", str(24 * 14)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "50"))
+
+# Output tokens to budget per call when rate limiting (about one long episode).
+RESPONSE_TOKEN_ALLOWANCE = 4000
+
+EPISODE_HEADERS = [
+    "=== EPISODE 1: BIG PICTURE & CONTEXT ===",
+    "=== EPISODE 2: SCRIPTURE WALKTHROUGH ===",
+    "=== EPISODE 3: DOCTRINES & PRINCIPLES ===",
+    "=== EPISODE 4: MODERN LIFE APPLICATION ===",
+]
+
+# What each episode covers when episodes are generated separately.
+EPISODE_FOCUS = [
+    "the big picture: historical setting, who wrote and received the text, and how this week fits the larger story",
+    "a walkthrough of the week's key passages in order, reading short verses and explaining them",
+    "the doctrines and principles taught this week, and why they matter",
+    "applying this week's teachings to modern individual and family life",
+]
+EPISODE_RETRIES = int(os.getenv("EPISODE_RETRIES", "2"))
+
+# Round trips allowed for paragraph-edit length fitting (fit_to_word_range).
+FIT_MAX_ROUNDS = int(os.getenv("FIT_MAX_ROUNDS", "3"))
+
+_llm_cache: DiskCache | None = None
+_llm_cache_lock = threading.Lock()
+
+
+def llm_cache_bypassed() -> bool:
+    return os.getenv("LLM_CACHE_BYPASS", "false").lower() == "true"
+
+
+def get_llm_cache() -> DiskCache:
+    """
+    Shared on-disk cache of model responses, keyed by (model, prompt hash).
+    """
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = DiskCache(
+                LLM_CACHE_DIR,
+                LLM_CACHE_MAX_MB * 1024 * 1024,
+                suffix=".json",
+                ttl_seconds=LLM_CACHE_TTL_HOURS * 3600,
+                max_entries=LLM_CACHE_MAX_ENTRIES,
+            )
+        return _llm_cache
+
+
+def _create_text(
+    client: OpenAI,
+    model: str,
+    prompt: str,
+    use_cache: bool = True,
+    purpose: str = "generate",
+) -> str:
+    """
+    responses.create(...).output_text, served from the LLM cache when the same
+    model and prompt were answered before. Set LLM_CACHE_BYPASS=true (or
+    use_cache=False) to always call the API; fresh answers are still stored.
+    Each call is traced as an "llm" span with token usage from the response.
+    """
+    with span("llm", model=model, purpose=purpose) as sp:
+        sp.add("prompt_chars", len(prompt))
+        cache = get_llm_cache()
+        key = cache_key(model, prompt)
+        if use_cache and not llm_cache_bypassed():
+            hit = cache.get(key)
+            if hit is not None:
+                print(f"LLM cache hit ({model}, {len(prompt)} chars)")
+                sp.add("cache_hits")
+                return json.loads(hit)["output_text"]
+
+        with throttle("responses", estimate_tokens(prompt) + RESPONSE_TOKEN_ALLOWANCE):
+            resp = client.responses.create(model=model, input=prompt)
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            sp.add("input_tokens", getattr(usage, "input_tokens", 0) or 0)
+            sp.add("output_tokens", getattr(usage, "output_tokens", 0) or 0)
+        text = resp.output_text
+        sp.add("output_chars", len(text))
+        cache.put(key, json.dumps({"model": model, "output_text": text}).encode("utf-8"))
+        return text
+
+
+def _stream_text(
+    client: OpenAI,
+    model: str,
+    prompt: str,
+    on_delta: Callable[[str], None],
+    use_cache: bool = True,
+    purpose: str = "generate",
+) -> str:
+    """
+    Like _create_text, but streams the response and passes each text delta to
+    on_delta as it arrives. A cache hit is delivered as a single delta.
+    """
+    with span("llm", model=model, purpose=purpose, stream=True) as sp:
+        sp.add("prompt_chars", len(prompt))
+        cache = get_llm_cache()
+        key = cache_key(model, prompt)
+        if use_cache and not llm_cache_bypassed():
+            hit = cache.get(key)
+            if hit is not None:
+                print(f"LLM cache hit ({model}, {len(prompt)} chars)")
+                sp.add("cache_hits")
+                text = json.loads(hit)["output_text"]
+                on_delta(text)
+                return text
+
+        parts: list[str] = []
+        with throttle("responses", estimate_tokens(prompt) + RESPONSE_TOKEN_ALLOWANCE):
+            stream = client.responses.create(model=model, input=prompt, stream=True)
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    if not parts:
+                        sp.set("first_token_seconds", round(time.time() - sp.start, 3))
+                    parts.append(event.delta)
+                    on_delta(event.delta)
+                elif event.type == "response.completed":
+                    usage = getattr(event.response, "usage", None)
+                    if usage is not None:
+                        sp.add("input_tokens", getattr(usage, "input_tokens", 0) or 0)
+                        sp.add("output_tokens", getattr(usage, "output_tokens", 0) or 0)
+                elif event.type == "response.failed":
+                    raise RuntimeError(f"Streamed response failed: {event.response.error}")
+        text = "".join(parts)
+        sp.add("output_chars", len(text))
+        cache.put(key, json.dumps({"model": model, "output_text": text}).encode("utf-8"))
+        return text
 
 
 def load_master_prompt(path: str = "prompts/master_prompt.txt") -> str:
@@ -22,14 +170,104 @@ def build_prompt(
     )
 
 
-def generate_scripts(prompt: str, model: str = "gpt-4o-mini") -> str:
-    client = OpenAI()
+def generate_scripts(prompt: str, model: str = "gpt-4o-mini", client: OpenAI | None = None) -> str:
+    client = client or get_client()
     try:
-        resp = client.responses.create(
-            model=model,
-            input=prompt,
+        return _create_text(client, model, prompt)
+    except RateLimitError as e:
+        raise SystemExit(
+            "OpenAI rate limit or quota issue.\n"
+            "Check billing for the API key in GitHub Secrets.\n"
+            f"Details: {e}"
         )
-        return resp.output_text
+    except APIStatusError as e:
+        raise SystemExit(f"OpenAI API error: {e}")
+
+
+class EpisodeSplitError(ValueError):
+    """
+    Streamed output whose episode headers are missing or out of order.
+    `text` is the output received so far.
+    """
+
+    def __init__(self, message: str, text: str):
+        super().__init__(message)
+        self.text = text
+
+
+class EpisodeSplitter:
+    """
+    Incremental version of splitting the 4-episode output on EPISODE_HEADERS.
+    feed() takes streamed text; when the next header appears, the episode before
+    it is complete and is passed to on_episode(n, text) (n = 1..4). close() emits
+    the last episode and returns the full text.
+    A header that appears before the one expected next raises EpisodeSplitError
+    from feed() (ending the stream early); close() raises it if any header is
+    still missing, without emitting the run-together last episode.
+    """
+
+    def __init__(self, on_episode: Callable[[int, str], None]):
+        self.on_episode = on_episode
+        self.parts: list[str] = []
+        self.length = 0
+        self.starts: list[int] = []
+        self._tail = ""  # end of the text seen so far, for headers split across deltas
+        self._keep = max(len(h) for h in EPISODE_HEADERS) - 1
+
+    def _emit(self, end: int) -> None:
+        text = "".join(self.parts)
+        self.on_episode(len(self.starts), text[self.starts[-1]:end].strip())
+
+    def feed(self, delta: str) -> None:
+        self.parts.append(delta)
+        window = self._tail + delta
+        base = self.length - len(self._tail)
+        self.length += len(delta)
+        while len(self.starts) < len(EPISODE_HEADERS):
+            header = EPISODE_HEADERS[len(self.starts)]
+            idx = window.find(header)
+            if idx == -1:
+                break
+            if self.starts:
+                self._emit(base + idx)
+            self.starts.append(base + idx)
+            window = window[idx + len(header):]
+            base += idx + len(header)
+        for header in EPISODE_HEADERS[len(self.starts) + 1:]:
+            if header in window:
+                raise EpisodeSplitError(
+                    f"Streamed output has {header!r} before {EPISODE_HEADERS[len(self.starts)]!r}.",
+                    "".join(self.parts),
+                )
+        self._tail = window[-self._keep:]
+
+    def close(self) -> str:
+        text = "".join(self.parts)
+        if len(self.starts) < len(EPISODE_HEADERS):
+            raise EpisodeSplitError(
+                f"Streamed output had {len(self.starts)} of {len(EPISODE_HEADERS)} episode headers.",
+                text,
+            )
+        self._emit(self.length)
+        return text
+
+
+def generate_scripts_streaming(
+    prompt: str,
+    on_episode: Callable[[int, str], None],
+    model: str = "gpt-4o-mini",
+    client: OpenAI | None = None,
+) -> str:
+    """
+    generate_scripts, streamed: each episode is handed to on_episode(n, text) as
+    soon as it is complete, while the model is still writing the next one.
+    Returns the full output text; raises EpisodeSplitError if the episode
+    headers are missing or out of order.
+    """
+    client = client or get_client()
+    splitter = EpisodeSplitter(on_episode)
+    try:
+        _stream_text(client, model, prompt, splitter.feed)
     except RateLimitError as e:
         raise SystemExit(
             "OpenAI rate limit or quota issue.\n"
@@ -38,6 +276,73 @@ def generate_scripts(prompt: str, model: str = "gpt-4o-mini") -> str:
         )
     except APIStatusError as e:
         raise SystemExit(f"OpenAI API error: {e}")
+    return splitter.close()
+
+
+def build_episode_prompt(prompt: str, n: int, min_words: int, max_words: int) -> str:
+    """
+    Turn the full 4-episode prompt into a request for episode n (1..4) only:
+    the other headers are removed and an episode assignment section is appended.
+    """
+    header = EPISODE_HEADERS[n - 1]
+    text = prompt.replace(
+        "Return EXACTLY 4 episodes.",
+        f"Return ONLY episode {n}. The other 3 episodes are written separately.",
+    )
+    for other in EPISODE_HEADERS:
+        if other != header:
+            text = text.replace(other + "\n", "")
+    return (
+        f"{text}\n\n"
+        f"EPISODE ASSIGNMENT (episode {n} of 4):\n"
+        f"Start with this exact header: {header}\n"
+        f"Focus on {EPISODE_FOCUS[n - 1]}.\n"
+        f"Length: {min_words}-{max_words} words.\n"
+        "Include the outline, full script, Pause & Ponder questions, weekly challenge and SHOW NOTES.\n"
+    )
+
+
+def generate_episode(
+    prompt: str,
+    n: int,
+    min_words: int,
+    max_words: int,
+    model: str = "gpt-4o-mini",
+    client: OpenAI | None = None,
+    retries: int = EPISODE_RETRIES,
+) -> str:
+    """
+    Generate episode n on its own (see build_episode_prompt). The output must
+    contain the episode's header and at least half the minimum length; text
+    before the header or from another episode's header on is cut. A failed or
+    invalid attempt is retried up to `retries` times, bypassing the LLM cache.
+    """
+    client = client or get_client()
+    ep_prompt = build_episode_prompt(prompt, n, min_words, max_words)
+    header = EPISODE_HEADERS[n - 1]
+    last_error = ""
+    for attempt in range(retries + 1):
+        try:
+            text = _create_text(client, model, ep_prompt, use_cache=attempt == 0, purpose=f"episode_{n}")
+        except APIError as e:
+            last_error = f"{type(e).__name__}: {e}"
+            print(f"Episode {n} generation attempt {attempt + 1} failed: {last_error}")
+            continue
+        start = text.find(header)
+        if start == -1:
+            last_error = "missing episode header"
+        else:
+            text = text[start:]
+            for other in EPISODE_HEADERS:
+                cut = text.find(other, len(header))
+                if other != header and cut != -1:
+                    text = text[:cut]
+            text = text.strip()
+            if word_count(text) >= min_words // 2:
+                return text
+            last_error = f"only {word_count(text)} words"
+        print(f"Episode {n} generation attempt {attempt + 1} rejected: {last_error}")
+    raise RuntimeError(f"Episode {n} generation failed after {retries + 1} attempt(s): {last_error}")
 
 
 def shorten_to_word_range(
@@ -45,8 +350,9 @@ def shorten_to_word_range(
     min_words: int,
     max_words: int,
     model: str = "gpt-4o-mini",
+    client: OpenAI | None = None,
 ) -> str:
-    client = OpenAI()
+    client = client or get_client()
     prompt = (
         "Shorten the script below to fit the target length while preserving meaning, tone, and structure.\n"
         f"Target: {min_words}-{max_words} words.\n"
@@ -57,8 +363,7 @@ def shorten_to_word_range(
         "SCRIPT:\n"
         f"{text}"
     )
-    resp = client.responses.create(model=model, input=prompt)
-    return resp.output_text
+    return _create_text(client, model, prompt, purpose="shorten")
 
 
 def expand_to_word_range(
@@ -66,8 +371,9 @@ def expand_to_word_range(
     min_words: int,
     max_words: int,
     model: str = "gpt-4o-mini",
+    client: OpenAI | None = None,
 ) -> str:
-    client = OpenAI()
+    client = client or get_client()
     prompt = (
         "Expand the script below to fit the target length while preserving meaning, tone, and structure.\n"
         f"Target: {min_words}-{max_words} words. You MUST reach at least {min_words} words.\n"
@@ -79,8 +385,145 @@ def expand_to_word_range(
         "SCRIPT:\n"
         f"{text}"
     )
-    resp = client.responses.create(model=model, input=prompt)
-    return resp.output_text
+    return _create_text(client, model, prompt, purpose="expand")
+
+
+def split_paragraphs(text: str) -> list[str]:
+    return [p.strip() for p in re.split(r"\n\s*\n", text.strip()) if p.strip()]
+
+
+def _is_protected(paragraph: str) -> bool:
+    return paragraph.startswith("=== EPISODE") or paragraph.startswith("SHOW NOTES:")
+
+
+def _parse_edits(text: str) -> dict | None:
+    """
+    The edit object from a reply, or None if there is none or it is the wrong
+    shape (insert: list of {"after": ID, "text": non-empty text}, drop: list of
+    IDs, condense: ID -> text).
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        edits = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(edits, dict):
+        return None
+    insert, drop, condense = edits.get("insert") or [], edits.get("drop") or [], edits.get("condense") or {}
+    if not (isinstance(insert, list) and all(
+        isinstance(i, dict) and isinstance(i.get("after"), str)
+        and isinstance(i.get("text"), str) and i["text"].strip()
+        for i in insert
+    )):
+        return None
+    if not (isinstance(drop, list) and all(isinstance(p, str) for p in drop)):
+        return None
+    if not (isinstance(condense, dict) and all(isinstance(v, str) for v in condense.values())):
+        return None
+    return {"insert": insert, "drop": drop, "condense": condense}
+
+
+def apply_paragraph_edits(paragraphs: list[str], edits: dict) -> list[str]:
+    """
+    Apply {"insert": [{"after": "P3", "text": ...}], "drop": ["P7"], "condense": {"P9": ...}}
+    (as checked by _parse_edits) to paragraphs labelled P1..Pn ("after": "P0"
+    inserts at the top, below the episode header). Unknown IDs are ignored, the
+    header and SHOW NOTES are never dropped or condensed, and inserts with an
+    unknown anchor go just before SHOW NOTES (or at the end).
+    """
+    ids = {f"P{i + 1}": i for i in range(len(paragraphs))}
+    drop = {
+        ids[p] for p in edits.get("drop") or []
+        if p in ids and not _is_protected(paragraphs[ids[p]])
+    }
+    condense = {
+        ids[k]: v.strip() for k, v in (edits.get("condense") or {}).items()
+        if k in ids and v.strip() and not _is_protected(paragraphs[ids[k]])
+    }
+
+    default_at = next((i - 1 for i, p in enumerate(paragraphs) if p.startswith("SHOW NOTES:")), len(paragraphs) - 1)
+    top = next((i - 1 for i, p in enumerate(paragraphs) if not p.startswith("=== EPISODE")), len(paragraphs) - 1)
+    inserts: dict[int, list[str]] = {}
+    for ins in edits.get("insert") or []:
+        at = top if ins["after"] == "P0" else ids.get(ins["after"], default_at)
+        inserts.setdefault(at, []).append(ins["text"].strip())
+
+    out = list(inserts.get(-1, []))
+    for i, p in enumerate(paragraphs):
+        if i not in drop:
+            out.append(condense.get(i, p))
+        out.extend(inserts.get(i, []))
+    return out
+
+
+def fit_to_word_range(
+    text: str,
+    min_words: int,
+    max_words: int,
+    model: str = "gpt-4o-mini",
+    client: OpenAI | None = None,
+    max_rounds: int = FIT_MAX_ROUNDS,
+    log: Callable[[str], None] | None = None,
+) -> str:
+    """
+    Bring a script into min_words..max_words by paragraph edits instead of a full
+    rewrite: the model sees numbered paragraphs and returns only paragraphs to
+    insert or IDs to drop/condense, which are applied locally and re-counted.
+    Stops after max_rounds round trips and returns the closest version seen;
+    retry rounds bypass the LLM cache.
+    """
+    client = client or get_client()
+    best, best_gap = text, None
+    for round_no in range(1, max_rounds + 1):
+        wc = word_count(text)
+        gap = max(min_words - wc, wc - max_words, 0)
+        if best_gap is None or gap < best_gap:
+            best, best_gap = text, gap
+        if gap == 0:
+            break
+
+        paragraphs = split_paragraphs(text)
+        target = (min_words + max_words) // 2
+        if wc < min_words:
+            goal = (
+                f"Lengthen by about {target - wc} words using \"insert\" only. "
+                "Add more explanation and modern-life examples; keep existing scriptures; do not add new sources."
+            )
+        else:
+            goal = (
+                f"Shorten by about {wc - target} words using \"drop\" and \"condense\". "
+                "Keep the header, scriptures, Pause & Ponder questions and SHOW NOTES."
+            )
+        prompt = (
+            "You are adjusting the length of a podcast script by editing whole paragraphs.\n"
+            f"Current length: {wc} words. Target: {min_words}-{max_words} words.\n"
+            f"{goal}\n"
+            "Return ONLY a JSON object of this shape (omit keys you don't use):\n"
+            '{"insert": [{"after": "P3", "text": "new paragraph"}], "drop": ["P7"], '
+            '"condense": {"P9": "shorter version of P9"}}\n'
+            "New and condensed text must read as natural spoken audio in the script's tone.\n\n"
+            "SCRIPT:\n"
+            + "\n\n".join(f"[P{i}] {p}" for i, p in enumerate(paragraphs, start=1))
+        )
+        # Only the first round may come from the cache: a later round with the same
+        # text (after an unusable reply) must ask again, not replay that reply.
+        reply = _create_text(client, model, prompt, use_cache=round_no == 1, purpose="fit")
+        edits = _parse_edits(reply)
+        if edits is None:
+            if log:
+                log(f"fit round {round_no}: unparseable edit list")
+            continue
+        text = "\n\n".join(apply_paragraph_edits(paragraphs, edits))
+        if log:
+            log(f"fit round {round_no}: {wc} -> {word_count(text)} words")
+    else:
+        wc = word_count(text)
+        gap = max(min_words - wc, wc - max_words, 0)
+        if best_gap is None or gap < best_gap:
+            best = text
+    return best
 
 
 def word_count(text: str) -> int:
@@ -1,7 +1,15 @@
+import io
 import os
+import sys
 from pathlib import Path
-from mutagen.id3 import ID3, TIT2, TPE1, TALB, TRCK, TDRC
-from mutagen.mp3 import MP3
+from mutagen.id3 import ID3, APIC, TIT2, TPE1, TALB, TRCK, TDRC, TLEN
+
+# Ensure repo root is importable when run as a script
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.mp3_frames import mp3_duration
+from src.feed_profiles import load_profiles
 
 EP_TITLES = {
     "E01": "Big Picture & Context",
@@ -10,52 +18,110 @@ EP_TITLES = {
     "E04": "Modern Life Application",
 }
 
-def main():
-    dist = Path("dist")
-    mp3s = sorted(dist.glob("W*_E*.mp3"))
-    if not mp3s:
-        raise SystemExit("No MP3s found in dist/ to tag.")
+PODCAST_TITLE = "CFM Personal Podcast"
+ARTIST = "Brandon Burton"
+ARTWORK_PATH = REPO_ROOT / "docs" / "podcast-artwork.jpg"
+
+# Free space reserved after the tag so later edits fit without rewriting the audio.
+ID3_PADDING = 8192
+
+
+def _keep_padding(info) -> int:
+    # Reuse existing padding when the new tag fits; otherwise reserve ID3_PADDING.
+    return info.padding if info.padding >= 0 else ID3_PADDING
+
+
+def apply_episode_tags(
+    tags: ID3,
+    week_num: str,
+    week_label: str,
+    week_title: str,
+    ecode: str,
+    duration: float | None,
+) -> None:
+    """
+    Set title/artist/album/track/year/length and cover art for one episode.
+    """
+    ep_num = ecode.replace("E", "")  # 01
+    ep_name = EP_TITLES.get(ecode, ecode)
+    album = f"{PODCAST_TITLE} — {week_label}" if week_label else PODCAST_TITLE
+
+    title = f"Week {week_num} ({week_label}) — Episode {ep_num}: {ep_name}"
+    if week_title:
+        title += f" — {week_title}"
+
+    for frame in ("TIT2", "TPE1", "TALB", "TRCK", "TDRC", "TLEN", "APIC"):
+        tags.delall(frame)
+
+    tags.add(TIT2(encoding=3, text=title))
+    tags.add(TPE1(encoding=3, text=ARTIST))
+    tags.add(TALB(encoding=3, text=album))
+    tags.add(TRCK(encoding=3, text=str(int(ep_num))))
+    tags.add(TDRC(encoding=3, text="2026"))
+    if duration is not None:
+        tags.add(TLEN(encoding=3, text=str(int(duration * 1000))))
+    if ARTWORK_PATH.exists():
+        tags.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=ARTWORK_PATH.read_bytes()))
 
-    week_label = os.environ.get("PODCAST_WEEK_LABEL", "").strip()
-    week_num = os.environ.get("PODCAST_WEEK_NUM", "").strip()
-    week_title = os.environ.get("PODCAST_WEEK_TITLE", "").strip()
 
-    podcast_title = "CFM Personal Podcast"
-    artist = "Brandon Burton"
-    album = f"{podcast_title} — {week_label}" if week_label else podcast_title
+def render_id3_header(
+    week_num: str,
+    week_label: str,
+    week_title: str,
+    ecode: str,
+    duration: float | None,
+) -> bytes:
+    """
+    A complete ID3v2 tag (with ID3_PADDING bytes of padding) to write at the
+    front of a new MP3, so the file is tagged in the same pass that writes the audio.
+    """
+    tags = ID3()
+    apply_episode_tags(tags, week_num, week_label, week_title, ecode, duration)
+    buf = io.BytesIO()
+    tags.save(buf, padding=lambda info: ID3_PADDING)
+    return buf.getvalue()
 
+
+def tag_file(mp3_path: Path, week_num: str, week_label: str, week_title: str) -> None:
+    """
+    (Re)tag an MP3 in place. Files written with render_id3_header have room in
+    their padding, so only the tag bytes are rewritten, not the audio.
+    """
+    ecode = mp3_path.name.split("_")[-1].replace(".mp3", "")  # E01
+
+    # Ensure file is a valid MP3 (reads the Xing header, no decoding)
+    duration = mp3_duration(mp3_path)
+    if duration is None:
+        raise SystemExit(f"Not a valid MP3: {mp3_path}")
+
+    try:
+        tags = ID3(mp3_path)
+    except Exception:
+        tags = ID3()
+
+    apply_episode_tags(tags, week_num, week_label, week_title, ecode, duration)
+    tags.save(mp3_path, padding=_keep_padding)
+
+
+def tag_week(dist: Path, week_num: str, week_label: str, week_title: str) -> int:
+    """
+    Retag every feed profile's MP3s in dist/. Returns the number of files tagged.
+    """
+    mp3s = [mp3 for profile in load_profiles() for mp3 in sorted(profile.dist_dir(dist).glob("W*_E*.mp3"))]
     for mp3_path in mp3s:
-        fname = mp3_path.name  # W02_E01.mp3
-        ecode = fname.split("_")[-1].replace(".mp3", "")  # E01
-        ep_num = ecode.replace("E", "")  # 01
-        ep_name = EP_TITLES.get(ecode, ecode)
-
-        title = f"Week {week_num} ({week_label}) — Episode {ep_num}: {ep_name}"
-        if week_title:
-            title += f" — {week_title}"
-
-        # Ensure file is a valid MP3
-        _ = MP3(mp3_path)
-
-        try:
-            tags = ID3(mp3_path)
-        except Exception:
-            tags = ID3()
-
-        tags.delall("TIT2")
-        tags.delall("TPE1")
-        tags.delall("TALB")
-        tags.delall("TRCK")
-        tags.delall("TDRC")
-
-        tags.add(TIT2(encoding=3, text=title))
-        tags.add(TPE1(encoding=3, text=artist))
-        tags.add(TALB(encoding=3, text=album))
-        tags.add(TRCK(encoding=3, text=str(int(ep_num))))
-        tags.add(TDRC(encoding=3, text="2026"))
-
-        tags.save(mp3_path)
+        tag_file(mp3_path, week_num, week_label, week_title)
         print(f"Tagged: {mp3_path}")
+    return len(mp3s)
+
+
+def main():
+    from src.publish_state import PublishState
+    from src.update_rss import week_info_for_tag
+
+    # Retagging a published week uses the metadata recorded in published.json
+    week = week_info_for_tag(os.environ["PODCAST_TAG"].strip(), PublishState())
+    if not tag_week(Path("dist"), week["num"], week["label"], week["title"]):
+        raise SystemExit("No MP3s found in dist/ to tag.")
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,26 @@
 from __future__ import annotations
 
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
 from openai import OpenAI
 
+from src.disk_cache import DiskCache, cache_key
+from src.mp3_frames import Mp3Info, assemble_mp3
+from src.rate_limit import throttle
+from src.instrument import span
+from src.openai_client import get_client
+
 MAX_TTS_CHARS = 3900  # stay under 4096 with a little margin
+TTS_MAX_WORKERS = int(os.getenv("TTS_MAX_WORKERS", "4"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".cache/tts")
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "500"))
+TTS_RESPONSE_FORMAT = "mp3"
+
 
 def _chunk_text(text: str, max_chars: int = MAX_TTS_CHARS) -> list[str]:
     """
@@ -46,23 +64,125 @@ def _chunk_text(text: str, max_chars: int = MAX_TTS_CHARS) -> list[str]:
     flush()
     return chunks
 
-def tts_to_mp3(text: str, voice: str = "alloy", model: str = "tts-1") -> bytes:
+
+_default_cache: DiskCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> DiskCache:
     """
-    Convert potentially-long text to MP3 bytes by chunking and concatenating MP3 data.
-    NOTE: MP3 concatenation is generally playable in most players/podcast apps.
+    Shared on-disk cache of synthesized chunks (TTS_CACHE_DIR, TTS_CACHE_MAX_MB).
     """
-    client = OpenAI()
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DiskCache(TTS_CACHE_DIR, TTS_CACHE_MAX_MB * 1024 * 1024, suffix=".mp3")
+        return _default_cache
+
 
-    chunks = _chunk_text(text)
-    mp3_parts: list[bytes] = []
+def _chunk_cache_key(chunk: str, voice: str, model: str) -> str:
+    return cache_key(model, voice, TTS_RESPONSE_FORMAT, chunk)
 
-    for idx, chunk in enumerate(chunks, start=1):
-        audio = client.audio.speech.create(
+
+def _synthesize_chunk_to_file(
+    client: OpenAI,
+    chunk: str,
+    voice: str,
+    model: str,
+    dest: Path,
+) -> None:
+    """
+    Stream one chunk's audio into dest as it arrives. Transient failures are
+    retried by the client (OPENAI_MAX_RETRIES, see openai_client.py), which
+    counts the attempts and retries on this span; a retry starts a new
+    response, so dest is only opened once one succeeds.
+    """
+    with span("tts.chunk", model=model, voice=voice) as sp:
+        sp.add("tts_chars", len(chunk))
+        with throttle("speech"), client.audio.speech.with_streaming_response.create(
             model=model,
             voice=voice,
             input=chunk,
-            response_format="mp3",
-        )
-        mp3_parts.append(audio.read())
+            response_format=TTS_RESPONSE_FORMAT,
+        ) as response:
+            with open(dest, "wb") as f:
+                for block in response.iter_bytes():
+                    f.write(block)
+        sp.add("bytes", dest.stat().st_size)
 
-    return b"".join(mp3_parts)
+
+def tts_to_file(
+    text: str,
+    out_path: str | Path,
+    voice: str = "alloy",
+    model: str = "tts-1",
+    max_workers: int | None = None,
+    id3_header: Callable[[Mp3Info | None], bytes] | None = None,
+    client: OpenAI | None = None,
+) -> int:
+    """
+    Convert potentially-long text to an MP3 file without holding the audio in memory.
+    Chunks already in the on-disk TTS cache are reused; the rest are streamed from
+    the API concurrently (up to max_workers at once, default TTS_MAX_WORKERS) into
+    per-chunk part files. The parts are joined frame by frame in their original
+    order (see mp3_frames.assemble_mp3, which writes one Xing header and seek
+    TOC for the whole episode) into a temp file that is atomically renamed onto
+    out_path. id3_header(info), if given, supplies a tag written at the front in
+    the same pass. Returns the bytes written.
+    """
+    with span("tts", model=model, voice=voice, file=Path(out_path).name) as sp:
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        client = client or get_client()
+        cache = get_tts_cache()
+
+        chunks = _chunk_text(text)
+        keys = [_chunk_cache_key(c, voice, model) for c in chunks]
+
+        with tempfile.TemporaryDirectory(dir=out_path.parent, prefix=".tts-") as tmp_dir:
+            parts = [Path(tmp_dir) / f"part{i:03d}.mp3" for i in range(len(chunks))]
+            todo = [i for i in range(len(chunks)) if not cache.get_file(keys[i], parts[i])]
+
+            def synth(i: int) -> None:
+                _synthesize_chunk_to_file(client, chunks[i], voice, model, parts[i])
+                cache.put_file(keys[i], parts[i])
+
+            workers = max(1, min(max_workers or TTS_MAX_WORKERS, len(todo) or 1))
+
+            if workers == 1:
+                for i in todo:
+                    synth(i)
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    # list() drains map() so the first chunk error is raised here.
+                    list(pool.map(synth, todo))
+
+            tmp_out = Path(tmp_dir) / out_path.name
+            with open(tmp_out, "wb") as out:
+                info = assemble_mp3(parts, out, prefix=id3_header)
+            size = tmp_out.stat().st_size
+            os.replace(tmp_out, out_path)
+
+        sp.add("chunks", len(chunks))
+        sp.add("chunks_cached", len(chunks) - len(todo))
+        sp.add("bytes_written", size)
+
+    duration = f", {info.duration:.1f}s" if info else ""
+    print(f"TTS: {len(chunks)} chunk(s), {len(chunks) - len(todo)} cached, synthesized {len(todo)}{duration}")
+    return size
+
+
+def tts_to_mp3(
+    text: str,
+    voice: str = "alloy",
+    model: str = "tts-1",
+    max_workers: int | None = None,
+) -> bytes:
+    """
+    Convert potentially-long text to MP3 bytes (see tts_to_file).
+    Prefer tts_to_file for whole episodes; this reads the result back into memory.
+    """
+    with tempfile.TemporaryDirectory(prefix="tts-") as tmp_dir:
+        out = Path(tmp_dir) / "out.mp3"
+        tts_to_file(text, out, voice=voice, model=model, max_workers=max_workers)
+        return out.read_bytes()
@@ -1,12 +1,19 @@
 import os
+import sys
 from pathlib import Path
-from datetime import datetime, timezone
-import xml.etree.ElementTree as ET
+from typing import Optional
+from datetime import date, datetime, timezone
 
-RSS_PATH = Path("docs/podcast.xml")
+# Ensure repo root is importable when run as a script
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.mp3_frames import mp3_duration
+from src.rss_store import FeedStore
+from src.publish_state import PublishState
+from src.feed_profiles import FeedProfile, load_profiles
 
-ITUNES_NS = "http://www.itunes.com/dtds/podcast-1.0.dtd"
-ET.register_namespace("itunes", ITUNES_NS)
+RSS_PATH = Path("docs/podcast.xml")
 
 EPISODE_TITLES = {
     "E01": "Big Picture & Context",
@@ -18,39 +25,81 @@ EPISODE_TITLES = {
 def rfc2822_now() -> str:
     return datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
 
-def get_existing_guids(channel) -> set[str]:
-    guids = set()
-    for item in channel.findall("item"):
-        g = item.findtext("guid")
-        if g:
-            guids.add(g.strip())
-    return guids
+def format_duration(seconds: float) -> str:
+    total = int(round(seconds))
+    return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+def week_info(week: dict) -> dict:
+    """
+    Feed fields for an index week record (as passed in-process by src/cli.py).
+    """
+    return {
+        "label": f"{week['start_date']} to {week['end_date']}",
+        "num": str(week["week"]),
+        "title": week.get("title", ""),
+        "scripture_blocks": week.get("scripture_blocks", ""),
+    }
+
+
+def week_info_for_tag(tag: str, state: Optional[PublishState] = None) -> dict:
+    """
+    Feed fields for a week tag (week-YYYY-MM-DD), for the standalone publish
+    steps: from published.json when the week is already published there,
+    otherwise (a week being published for the first time) from the week index.
+    """
+    from src.week_index import load_week_index
+
+    recorded = (state or PublishState()).week_info(tag)
+    if recorded:
+        return recorded
+    try:
+        week = load_week_index().week_for_date(date.fromisoformat(tag.removeprefix("week-")))
+    except ValueError:
+        week = None
+    if not week:
+        raise SystemExit(f"No week in cfm_index/ for tag {tag!r}")
+    return week_info(week)
+
+
+def publish_feeds(repo: str, tag: str, week: dict, state: PublishState) -> None:
+    """
+    Add the week's MP3s to every feed (feeds.json) and record the week in
+    published.json, which is saved at the end; only the primary feed's
+    episodes are tracked there.
+    """
+    state.set_week(tag, week)
+    for profile in load_profiles():
+        update_feed(profile, repo, tag, week, state if profile.primary else None)
+    state.save()
+
 
 def main():
     repo = os.environ["GITHUB_REPOSITORY"]  # OWNER/REPO
     tag = os.environ["PODCAST_TAG"]
-    week_label = os.environ["PODCAST_WEEK_LABEL"]
-    week_num = os.environ.get("PODCAST_WEEK_NUM", "").strip()
-    week_title = os.environ.get("PODCAST_WEEK_TITLE", "").strip()
-    scripture_blocks = os.environ.get("PODCAST_SCRIPTURE_BLOCKS", "").strip()
+    state = PublishState()
+    publish_feeds(repo, tag, week_info_for_tag(tag, state), state)
 
+
+def update_feed(profile: FeedProfile, repo: str, tag: str, week: dict, state: PublishState | None) -> None:
     # GitHub Pages base
     owner, name = repo.split("/", 1)
     pages_base = f"https://{owner}.github.io/{name}"
-    media_base = f"{pages_base}/media/{tag}"
+    media_dir = profile.media_dir(tag)
+    media_base = f"{pages_base}/{media_dir.relative_to('docs').as_posix()}"
 
     show_link = f"https://github.com/{repo}"
     pubdate = rfc2822_now()
 
-    tree = ET.parse(RSS_PATH)
-    root = tree.getroot()
-    channel = root.find("channel")
-    if channel is None:
-        raise SystemExit("Invalid RSS: missing <channel>")
-
-    existing_guids = get_existing_guids(channel)
+    # Items live in <feed>_items.json; the XML is rendered from it. A new feed
+    # takes its channel metadata from the primary feed.
+    feed_path = Path(profile.feed)
+    store = FeedStore(
+        feed_path,
+        f"{pages_base}/{feed_path.relative_to('docs').as_posix()}",
+        template=RSS_PATH,
+        title=profile.title,
+    )
 
-    media_dir = Path("docs") / "media" / tag
     mp3s = sorted(media_dir.glob("W*_E*.mp3"))
     if not mp3s:
         raise SystemExit(f"No MP3s found in {media_dir}")
@@ -65,48 +114,40 @@ def main():
         nice_ep = EPISODE_TITLES.get(ecode, ecode)
         guid_value = f"{tag}:{fname}"
 
-        if guid_value in existing_guids:
+        duration = mp3_duration(mp3)
+        duration_str = format_duration(duration) if duration is not None else None
+        if state is not None:
+            state.record_episode(tag, mp3, duration_str)
+
+        if store.has(guid_value):
             print(f"RSS: skipping existing item (guid={guid_value})")
             continue
 
-        item = ET.Element("item")
-
-        title_el = ET.SubElement(item, "title")
-        if week_num:
-            title_el.text = f"Week {week_num} ({week_label}) — Episode {ecode[-2:]}: {nice_ep}"
+        if week["num"]:
+            title = f"Week {week['num']} ({week['label']}) — Episode {ecode[-2:]}: {nice_ep}"
         else:
-            title_el.text = f"Week {week_label} — Episode {ecode[-2:]}: {nice_ep}"
+            title = f"Week {week['label']} — Episode {ecode[-2:]}: {nice_ep}"
 
-        desc_el = ET.SubElement(item, "description")
         parts = []
-        if week_title:
-            parts.append(week_title)
-        if scripture_blocks:
-            parts.append(f"Study: {scripture_blocks}")
-        parts.append(f"Week: {week_label}")
-        desc_el.text = " | ".join([p for p in parts if p])
-
-        link_el = ET.SubElement(item, "link")
-        link_el.text = show_link
-
-        guid_el = ET.SubElement(item, "guid")
-        guid_el.text = guid_value
-        guid_el.set("isPermaLink", "false")
-
-        pub_el = ET.SubElement(item, "pubDate")
-        pub_el.text = pubdate
-
-        enclosure = ET.SubElement(item, "enclosure")
-        enclosure.set("url", url)
-        enclosure.set("length", str(size))
-        enclosure.set("type", "audio/mpeg")
-
-        channel.insert(0, item)
-        existing_guids.add(guid_value)
+        if week["title"]:
+            parts.append(week["title"])
+        if week["scripture_blocks"]:
+            parts.append(f"Study: {week['scripture_blocks']}")
+        parts.append(f"Week: {week['label']}")
+
+        store.add({
+            "guid": guid_value,
+            "title": title,
+            "description": " | ".join([p for p in parts if p]),
+            "link": show_link,
+            "pubDate": pubdate,
+            "enclosure": {"url": url, "length": str(size), "type": "audio/mpeg"},
+            "duration": duration_str,
+        })
         print(f"RSS: added {fname} -> {url}")
 
-    tree.write(RSS_PATH, encoding="utf-8", xml_declaration=True)
-    print("RSS: podcast.xml updated successfully")
+    store.write()
+    print(f"RSS: {feed_path.name} updated successfully")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,194 @@
+"""
+Compiled, multi-year week index.
+
+Usage:
+  python src/week_index.py              # validate cfm_index/cfm_*_index.json and compile
+  python src/week_index.py 2026-03-04   # show the week containing a date
+
+All manual years are merged into one list sorted by start date, so the week
+for any date is found by bisecting the start dates. The compiled form is
+cached in .cache/week_index.json and rebuilt whenever a source file changes.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import re
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+# Ensure repo root is importable when run as a script
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.manifest import file_sha256
+
+INDEX_GLOB = "cfm_index/cfm_*_index.json"
+COMPILED_PATH = Path(os.getenv("WEEK_INDEX_CACHE", ".cache/week_index.json"))
+COMPILED_VERSION = 1
+
+
+def _year_of(path: Path) -> int:
+    m = re.search(r"(\d{4})", path.name)
+    if not m:
+        raise SystemExit(f"{path}: cannot tell the manual year from the file name")
+    return int(m.group(1))
+
+
+def validate(weeks: list[dict], source: str) -> tuple[list[str], list[str]]:
+    """
+    Check one manual year. Returns (errors, warnings): duplicate week numbers,
+    bad or reversed dates and overlapping ranges are errors; gaps between
+    consecutive weeks are warnings.
+    """
+    errors: list[str] = []
+    warnings: list[str] = []
+    seen: set[int] = set()
+    for wk in weeks:
+        for field in ("week", "start_date", "end_date", "title", "url"):
+            if field not in wk:
+                errors.append(f"{source}: week {wk.get('week', '?')} is missing '{field}'")
+        num = wk.get("week")
+        if num in seen:
+            errors.append(f"{source}: duplicate week number {num}")
+        seen.add(num)
+        try:
+            if date.fromisoformat(wk["end_date"]) < date.fromisoformat(wk["start_date"]):
+                errors.append(f"{source}: week {num} ends before it starts")
+        except (KeyError, ValueError) as e:
+            errors.append(f"{source}: week {num} has a bad date ({e})")
+
+    if errors:
+        return errors, warnings
+
+    ordered = sorted(weeks, key=lambda wk: wk["start_date"])
+    for prev, cur in zip(ordered, ordered[1:]):
+        prev_end = date.fromisoformat(prev["end_date"])
+        cur_start = date.fromisoformat(cur["start_date"])
+        if cur_start <= prev_end:
+            errors.append(f"{source}: weeks {prev['week']} and {cur['week']} overlap")
+        elif cur_start != prev_end + timedelta(days=1):
+            warnings.append(f"{source}: gap between week {prev['week']} and week {cur['week']}")
+    return errors, warnings
+
+
+class WeekIndex:
+    """
+    Sorted week records (each with a "year" field) plus parallel start/end
+    ordinals for bisecting.
+    """
+
+    def __init__(self, weeks: list[dict]):
+        self.weeks = sorted(weeks, key=lambda wk: wk["start_date"])
+        self.starts = [date.fromisoformat(wk["start_date"]).toordinal() for wk in self.weeks]
+        self.ends = [date.fromisoformat(wk["end_date"]).toordinal() for wk in self.weeks]
+        self.by_number = {(wk["year"], int(wk["week"])): wk for wk in self.weeks}
+
+    def __len__(self) -> int:
+        return len(self.weeks)
+
+    def week_for_date(self, d: date) -> Optional[dict]:
+        """
+        The week whose start..end range contains d, in O(log n).
+        """
+        i = bisect.bisect_right(self.starts, d.toordinal()) - 1
+        if i >= 0 and d.toordinal() <= self.ends[i]:
+            return self.weeks[i]
+        return None
+
+    def week_by_number(self, week: int, year: Optional[int] = None) -> Optional[dict]:
+        """
+        Look up a week number in a manual year (default: the latest year indexed).
+        """
+        if year is None:
+            year = self.weeks[-1]["year"] if self.weeks else 0
+        return self.by_number.get((year, int(week)))
+
+    def weeks_between(self, start: Optional[date] = None, end: Optional[date] = None) -> list[dict]:
+        """
+        Weeks whose start date falls within start..end (inclusive).
+        """
+        lo = bisect.bisect_left(self.starts, start.toordinal()) if start else 0
+        hi = bisect.bisect_right(self.starts, end.toordinal()) if end else len(self.weeks)
+        return self.weeks[lo:hi]
+
+
+def compile_index(paths: Optional[list[Path]] = None) -> tuple[WeekIndex, list[str]]:
+    """
+    Load and validate every index file. Raises SystemExit on errors (including
+    overlaps between years); returns the index and any gap warnings.
+    """
+    paths = sorted(paths if paths is not None else REPO_ROOT.glob(INDEX_GLOB))
+    if not paths:
+        raise SystemExit(f"No index files match {INDEX_GLOB}")
+
+    weeks: list[dict] = []
+    errors: list[str] = []
+    warnings: list[str] = []
+    for path in paths:
+        year = _year_of(path)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        errs, warns = validate(data, path.name)
+        errors += errs
+        warnings += warns
+        weeks += [dict(wk, year=year) for wk in data]
+
+    if not errors:
+        # Years must not overlap each other either.
+        errs, _ = validate(
+            [dict(wk, week=f"{wk['year']}/{wk['week']}") for wk in weeks], "all years"
+        )
+        errors += errs
+    if errors:
+        raise SystemExit("Week index is invalid:\n  " + "\n  ".join(errors))
+    return WeekIndex(weeks), warnings
+
+
+def load_week_index(paths: Optional[list[Path]] = None) -> WeekIndex:
+    """
+    The compiled index, reusing .cache/week_index.json while its sources are unchanged.
+    """
+    paths = sorted(paths if paths is not None else REPO_ROOT.glob(INDEX_GLOB))
+    sources = {p.name: file_sha256(p) for p in paths}
+    try:
+        compiled = json.loads(COMPILED_PATH.read_text(encoding="utf-8"))
+        if compiled.get("version") == COMPILED_VERSION and compiled.get("sources") == sources:
+            return WeekIndex(compiled["weeks"])
+    except (OSError, ValueError):
+        pass
+
+    index, warnings = compile_index(paths)
+    for w in warnings:
+        print(f"Week index warning: {w}")
+    COMPILED_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = COMPILED_PATH.with_name(f"{COMPILED_PATH.name}.tmp")
+    tmp.write_text(
+        json.dumps({"version": COMPILED_VERSION, "sources": sources, "weeks": index.weeks}, separators=(",", ":")),
+        encoding="utf-8",
+    )
+    os.replace(tmp, COMPILED_PATH)
+    return index
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        index = load_week_index()
+        wk = index.week_for_date(date.fromisoformat(sys.argv[1]))
+        if not wk:
+            raise SystemExit(f"No week contains {sys.argv[1]}")
+        print(f"{wk['year']} week {wk['week']}: {wk['start_date']} to {wk['end_date']} | {wk['title']}")
+        return
+
+    index, warnings = compile_index()
+    for w in warnings:
+        print(f"WARNING: {w}")
+    years = sorted({wk["year"] for wk in index.weeks})
+    print(f"Week index OK: {len(index)} week(s) across {', '.join(map(str, years))}")
+    load_week_index()
+
+
+if __name__ == "__main__":
+    main()